@@ -0,0 +1,169 @@
+# answer_cache.py persistent cache of tutor answers in student.db
+import hashlib
+import os
+import re
+import threading
+import time
+from db_pool import connection, transaction
+
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "1") != "0"
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", str(7 * 24 * 3600)))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "5000"))
+
+# Near-duplicate lookup against the most recently used entries in the same
+# (subject, grade, approach) bucket. A near hit needs the same content words
+# in the same order, so "4 divided by 100" never matches "100 divided by 4";
+# only filler words may differ. Content words must match exactly: a near
+# spelling is often another term ("mitosis" / "meiosis", "endothermic" /
+# "exothermic") with a different answer.
+SIMILARITY_CANDIDATES = 200
+SIMILARITY_MAX_LENGTH = 500  # long (file-based) questions only match exactly
+STOPWORDS = frozenset(
+    "a an the is are was were be am do does did please me my i you can could "
+    "would will tell explain s".split()
+)
+
+_stats = {"hits": 0, "near_hits": 0, "misses": 0, "stores": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def get_stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+def normalize_question(question):
+    """Lower-case, drop sentence punctuation and spacing around math operators"""
+    q = question.lower().strip()
+    q = re.sub(r"\s*([+\-*/=<>^()])\s*", r"\1", q)
+    q = re.sub(r"[?!,;:\"']+", " ", q)
+    q = re.sub(r"(?<!\d)\.|\.(?!\d)", " ", q)  # keep decimal points
+    return " ".join(q.split())
+
+
+def make_key(question_norm, subject, grade, approach):
+    raw = "\x1f".join([question_norm, subject or "", grade or "", approach or ""])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(a, b):
+    ta, tb = _trigrams(a), _trigrams(b)
+    if not ta or not tb:
+        return 0.0
+    return len(ta & tb) / len(ta | tb)
+
+
+def _content_words(question_norm):
+    return [w for w in question_norm.split() if w not in STOPWORDS]
+
+
+def is_near_duplicate(a, b):
+    """True when normalized questions a and b have the same content words in order"""
+    words_a, words_b = _content_words(a), _content_words(b)
+    return bool(words_a) and words_a == words_b
+
+
+def lookup(question, subject, grade, approach):
+    """Return a cached answer for this (or a near-identical) question, or None"""
+    if not ANSWER_CACHE_ENABLED:
+        return None
+    question_norm = normalize_question(question)
+    key = make_key(question_norm, subject, grade, approach)
+    now = time.time()
+    with connection() as conn:
+        row = conn.execute(
+            "SELECT answer, created_at FROM answer_cache WHERE cache_key = ?", (key,)
+        ).fetchone()
+        if row and now - row[1] <= ANSWER_CACHE_TTL:
+            _touch(key, now)
+            _count("hits")
+            return row[0]
+
+        if len(question_norm) <= SIMILARITY_MAX_LENGTH:
+            candidates = conn.execute(
+                """
+                SELECT cache_key, question_norm, answer FROM answer_cache
+                WHERE subject = ? AND grade = ? AND approach = ? AND created_at >= ?
+                ORDER BY last_used_at DESC
+                LIMIT ?
+                """,
+                (subject, grade, approach, now - ANSWER_CACHE_TTL, SIMILARITY_CANDIDATES),
+            ).fetchall()
+            best_key, best_answer, best_score = None, None, -1.0
+            for cand_key, cand_norm, cand_answer in candidates:
+                if not is_near_duplicate(question_norm, cand_norm):
+                    continue
+                score = similarity(question_norm, cand_norm)
+                if score > best_score:
+                    best_key, best_answer, best_score = cand_key, cand_answer, score
+            if best_key:
+                _touch(best_key, now)
+                _count("near_hits")
+                return best_answer
+
+        _count("misses")
+        return None
+
+
+def _touch(key, now):
+    with transaction() as c:
+        c.execute(
+            """
+            UPDATE answer_cache
+            SET last_used_at = ?, hit_count = hit_count + 1
+            WHERE cache_key = ?
+            """,
+            (now, key),
+        )
+
+
+def store(question, subject, grade, approach, answer):
+    """Cache an answer, then drop expired entries and evict least recently used"""
+    if not ANSWER_CACHE_ENABLED or not answer:
+        return
+    question_norm = normalize_question(question)
+    key = make_key(question_norm, subject, grade, approach)
+    now = time.time()
+    with transaction() as c:
+        c.execute(
+            """
+            INSERT INTO answer_cache
+            (cache_key, subject, grade, approach, question_norm, answer, created_at, last_used_at, hit_count)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)
+            ON CONFLICT (cache_key) DO UPDATE SET
+                answer = excluded.answer,
+                created_at = excluded.created_at,
+                last_used_at = excluded.last_used_at
+            """,
+            (key, subject, grade, approach, question_norm, answer, now, now),
+        )
+        c.execute(
+            "DELETE FROM answer_cache WHERE created_at < ?",
+            (now - ANSWER_CACHE_TTL,),
+        )
+        c.execute(
+            """
+            DELETE FROM answer_cache WHERE cache_key IN (
+                SELECT cache_key FROM answer_cache
+                ORDER BY last_used_at
+                LIMIT max(0, (SELECT COUNT(*) FROM answer_cache) - ?)
+            )
+            """,
+            (ANSWER_CACHE_MAX_ENTRIES,),
+        )
+    _count("stores")
+
+
+def clear():
+    with transaction() as c:
+        c.execute("DELETE FROM answer_cache")
@@ -1,16 +1,19 @@
 #
 
-import sqlite3
 import json
 from datetime import datetime, timedelta
 import os
 import streamlit as st
-import pandas as pd
-import plotly.express as px
 import re
+import uuid
+import perf_trace
+from lazy_imports import import_timings, lazy_import
+from perf_trace import span
 from quiz_logic import quiz_component
+from quiz_db import init_quiz_db
 from student_utils import get_student_weak_topics
-from tutor_engine import ask_tutor_sync
+from tutor_engine import ask_tutor_stream
+from subject_classifier import check_subject_compliance, start_training
 from auth import logout_session
 from auth import (
     create_users_table,
@@ -19,18 +22,29 @@ from auth import (
     login_in_session,
     logout_session,
     persistent_login,
+    mark_logged_in,
 )
+from db_pool import connection
 from student_db import (
     log_interaction,
-    get_recent_interactions,
+    get_interaction_page,
+    get_interaction_detail,
+    get_recent_activity,
     set_feedback,
     init_db,
-    get_gamification,
-    update_gamification,
+    get_dashboard_students,
+    get_dashboard_summary,
 )
+from gamification_service import get_gamification, update_gamification
 from file_handler import render_file_upload_section, get_file_analysis_prompt
+from documents import build_file_question, FILE_ANALYSIS_REQUEST
 from weekly_email import send_weekly_email, get_weekly_summary
 
+# Charts and tables load pandas/plotly on first use, so the login page
+# does not pay for them
+pd = lazy_import("pandas")
+px = lazy_import("plotly.express")
+
 # ----------------- DATABASE SETUP -----------------
 DB_NAME = "student.db"
 
@@ -39,19 +53,18 @@ def get_feedback_summary(student_name, grade):
     """
     Returns feedback counts for Plotly chart.
     """
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute(
-        """
-        SELECT feedback, COUNT(*) 
-        FROM interactions 
-        WHERE student = ? AND grade = ?
-        GROUP BY feedback
-    """,
-        (student_name, grade),
-    )
-    rows = c.fetchall()
-    conn.close()
+    with connection() as conn:
+        c = conn.cursor()
+        c.execute(
+            """
+            SELECT feedback, COUNT(*) 
+            FROM interactions 
+            WHERE student = ? AND grade = ?
+            GROUP BY feedback
+        """,
+            (student_name, grade),
+        )
+        rows = c.fetchall()
     return rows
 
 
@@ -67,6 +80,86 @@ def parse_date(date_str):
     return None
 
 
+HISTORY_PAGE_SIZE = 10
+PROGRESS_CHART_INTERACTIONS = 10  # latest interactions in the student's charts
+
+
+def history_page(student_name, grade, key):
+    """
+    Current page of a student's interaction history.
+    The start cursor of every page visited so far is kept in session state.
+    Returns (rows, next_cursor, state_key).
+    """
+    state_key = f"history_{key}_{student_name}_{grade}"
+    cursors = st.session_state.setdefault(state_key, [None])
+    rows, next_cursor = get_interaction_page(
+        student_name, grade, HISTORY_PAGE_SIZE, cursors[-1]
+    )
+    return rows, next_cursor, state_key
+
+
+def history_nav(state_key, next_cursor):
+    """Newer/Older buttons under a history page"""
+    cursors = st.session_state[state_key]
+    newer_col, page_col, older_col = st.columns([1, 2, 1])
+    if newer_col.button("⬅️ Newer", key=f"{state_key}_newer", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.rerun()
+    page_col.caption(f"Page {len(cursors)}")
+    if older_col.button("Older ➡️", key=f"{state_key}_older", disabled=next_cursor is None):
+        cursors.append(next_cursor)
+        st.rerun()
+
+
+def show_answer_details(inter_id):
+    """Answer and resources of an interaction, loaded only when asked for"""
+    if not st.checkbox("Show answer", key=f"show_answer_{inter_id}"):
+        return
+    _, a, resources, document_hash = get_interaction_detail(inter_id)
+    if document_hash:
+        st.caption("📎 Asked about an uploaded file")
+    st.markdown("**Answer:**")
+    st.write(a)
+
+    try:
+        res_list = json.loads(resources) if resources else []
+        if res_list:
+            st.markdown("**📚 Resources:**")
+            for r in res_list:
+                st.write(f"- [{r.get('title','Resource')}]({r.get('link','#')})")
+    except Exception:
+        pass
+
+
+def show_perf_panel(trace):
+    """Sidebar table of where this rerun spent its time"""
+    with st.sidebar.expander(f"⏱️ Rerun took {trace.total_ms:.0f} ms", expanded=True):
+        rows = trace.summary()
+        if rows:
+            st.dataframe(
+                pd.DataFrame(rows, columns=["span", "count", "total ms", "max ms"]).round(1),
+                hide_index=True,
+                use_container_width=True,
+            )
+            if perf_trace.PERF_TRACE_FILE:
+                st.caption(f"Appended to {perf_trace.PERF_TRACE_FILE}")
+        else:
+            st.caption("No traced calls in this rerun.")
+
+        # First-use cost of the lazily imported libraries, in this process
+        timings = import_timings()
+        if timings:
+            st.caption("Lazy imports so far (ms)")
+            st.dataframe(
+                pd.DataFrame(
+                    [(name, seconds * 1000) for name, seconds in timings.items()],
+                    columns=["module", "import ms"],
+                ).round(1),
+                hide_index=True,
+                use_container_width=True,
+            )
+
+
 import streamlit as st
 from auth import (
     create_users_table,
@@ -77,8 +170,35 @@ from auth import (
     persistent_login,
 )
 
+# ----------------- PERFORMANCE TRACE -----------------
+# Spans from student_db, tutor_engine, file_handler, quiz_logic and the
+# charts below are collected per rerun when PERF_TRACE=1 or the sidebar
+# panel is on; the panel itself is drawn at the end of the script.
+st.session_state.setdefault("perf_session", uuid.uuid4().hex[:8])
+st.session_state["perf_rerun"] = st.session_state.get("perf_rerun", 0) + 1
+perf = perf_trace.begin_rerun(
+    previous=st.session_state.pop("perf_trace", None),
+    enabled=perf_trace.PERF_TRACE or st.session_state.get("perf_panel", False),
+    session=st.session_state["perf_session"],
+    rerun=st.session_state["perf_rerun"],
+)
+if perf:
+    st.session_state["perf_trace"] = perf
+
+
 # ----------------- INIT -----------------
-create_users_table()
+@st.cache_resource
+def init_storage():
+    """Create tables and apply migrations once per server process"""
+    init_db()
+    create_users_table()
+    init_quiz_db()
+    # trains in the background; questions are checked by keyword until then
+    start_training()
+
+
+with span("app.init_storage"):
+    init_storage()
 
 if "logged_in" not in st.session_state:
     st.session_state.logged_in = False
@@ -99,11 +219,7 @@ if not st.session_state.logged_in:
         user = login_user(email, password, role)
         if user:
             # Mark user as logged in
-            conn = sqlite3.connect("student.db")
-            c = conn.cursor()
-            c.execute("UPDATE users SET is_logged_in=1 WHERE id=?", (user[0],))
-            conn.commit()
-            conn.close()
+            mark_logged_in(user[0])
 
             login_in_session(user)
             st.success("✅ Login successful! Redirecting...")
@@ -133,237 +249,6 @@ if st.sidebar.button("Logout"):
 user_role = st.session_state.user.get("role")
 
 
-# ----------------- SUBJECT COMPLIANCE -----------------
-def check_subject_compliance(question_text, selected_subject):
-    """
-    Validate that a question belongs to the selected subject.
-    Only allow questions related to the selected subject.
-    """
-    q = question_text.lower()
-
-    subject_keywords = {
-        "Math": [
-            "solve",
-            "equation",
-            "algebra",
-            "geometry",
-            "numbers",
-            "calculate",
-            "formula",
-            "fraction",
-            "integral",
-            "derivative",
-            "limit",
-            "function",
-            "graph",
-            "polynomial",
-            "quadratic",
-            "linear",
-            "logarithm",
-            "trigonometry",
-            "sine",
-            "cosine",
-            "tangent",
-            "statistics",
-            "probability",
-            "mean",
-            "median",
-            "mode",
-            "matrix",
-            "vector",
-            "coordinate",
-            "angle",
-            "triangle",
-            "circle",
-            "rectangle",
-            "square",
-            "area",
-            "perimeter",
-            "volume",
-            "surface area",
-            "pythagorean",
-            "arithmetic",
-            "multiplication",
-            "division",
-            "addition",
-            "subtraction",
-            "percentage",
-            "ratio",
-            "proportion",
-            "decimal",
-            "integer",
-            "prime",
-            "composite",
-            "factor",
-            "multiple",
-            "gcd",
-            "lcm",
-            "inequality",
-            "complex number",
-            "+",
-            "-",
-            "*",
-            "/",
-            "=",
-            "<",
-            ">",
-            "≤",
-            "≥",
-            "∑",
-            "∏",
-            "∫",
-            "∆",
-        ],
-        "Science": [
-            "force",
-            "energy",
-            "motion",
-            "velocity",
-            "acceleration",
-            "gravity",
-            "friction",
-            "momentum",
-            "pressure",
-            "temperature",
-            "heat",
-            "light",
-            "sound",
-            "wave",
-            "electricity",
-            "magnetism",
-            "current",
-            "voltage",
-            "resistance",
-            "circuit",
-            "newton",
-            "law of motion",
-            "first law",
-            "second law",
-            "third law",
-            "atom",
-            "molecule",
-            "chemical",
-            "reaction",
-            "element",
-            "compound",
-            "mixture",
-            "acid",
-            "base",
-            "ph",
-            "bond",
-            "periodic table",
-            "cell",
-            "organism",
-            "dna",
-            "rna",
-            "gene",
-            "photosynthesis",
-            "ecosystem",
-            "enzyme",
-            "protein",
-            "chromosome",
-            "evolution",
-            "bacteria",
-            "virus",
-            "earthquake",
-            "volcano",
-            "rock",
-            "mineral",
-            "fossil",
-            "weather",
-            "climate",
-            "atmosphere",
-        ],
-        "English": [
-            "grammar",
-            "syntax",
-            "sentence",
-            "paragraph",
-            "noun",
-            "verb",
-            "adjective",
-            "adverb",
-            "pronoun",
-            "preposition",
-            "conjunction",
-            "interjection",
-            "subject",
-            "predicate",
-            "object",
-            "clause",
-            "phrase",
-            "tense",
-            "punctuation",
-            "comma",
-            "period",
-            "semicolon",
-            "apostrophe",
-            "quotation",
-            "essay",
-            "write",
-            "writing",
-            "composition",
-            "introduction",
-            "conclusion",
-            "thesis",
-            "argument",
-            "narrative",
-            "descriptive",
-            "persuasive",
-            "expository",
-            "literature",
-            "poem",
-            "novel",
-            "story",
-            "character",
-            "plot",
-            "theme",
-            "metaphor",
-            "simile",
-            "alliteration",
-            "rhyme",
-            "vocabulary",
-            "synonym",
-            "antonym",
-        ],
-        "General": [],
-    }
-
-    math_patterns = [
-        r"\d+x",
-        r"x[\+\-\*/]\d+",
-        r"\d+x\^\d+",
-        r"f\(x\)",
-        r"[a-z]\^2",
-        r"\d+/\d+",
-        r"√\d+",
-        r"\d+%",
-    ]
-
-    detected_subjects = []
-
-    for subject, keywords in subject_keywords.items():
-        if subject == "General":
-            continue
-        for kw in keywords:
-            if kw in q:
-                detected_subjects.append(subject)
-
-    for pat in math_patterns:
-        if re.search(pat, question_text):
-            detected_subjects.append("Math")
-
-    detected_subjects = list(set(detected_subjects))
-
-    if selected_subject == "General":
-        return True, detected_subjects
-
-    if selected_subject in detected_subjects:
-        return True, detected_subjects
-
-    return False, detected_subjects
-
-
 # ----------------- STREAMLIT SETUP -----------------
 st.set_page_config(layout="wide", page_title="AI Tutor Prototype")
 
@@ -395,21 +280,14 @@ if user_role == "Student":
 
     extracted_text, file_info, question = render_file_upload_section(subject)
 
+    # The tutor gets the file text inline; the interaction only stores the
+    # student's question and points at the deduplicated document
     combined_question = ""
-    if extracted_text and question.strip():
-        combined_question = f"""I have uploaded a file with the following content:
-
-{extracted_text}
-
-My specific question about this content is:
-{question.strip()}"""
-    elif extracted_text and not question.strip():
-        combined_question = f"""I have uploaded a file with the following content:
-
-{extracted_text}
-
-Please analyze this content and provide insights, explanations, or answer any questions you think might be relevant to this material."""
-    elif question.strip() and not extracted_text:
+    logged_question = question.strip()
+    if extracted_text:
+        combined_question = build_file_question(extracted_text, question.strip())
+        logged_question = question.strip() or FILE_ANALYSIS_REQUEST
+    elif question.strip():
         combined_question = question.strip()
 
     if st.button("Send", type="primary"):
@@ -459,9 +337,15 @@ Please analyze this content and provide insights, explanations, or answer any qu
                         st.info("🤔 Tutor is thinking...")
 
                 try:
-                    answer_text, hints, resources_json = ask_tutor_sync(
+                    # Render the answer token by token as it streams in
+                    stream = ask_tutor_stream(
                         combined_question, subject, grade, student_name
                     )
+                    streamed_text = ""
+                    for delta in stream:
+                        streamed_text += delta
+                        placeholder.markdown(streamed_text + "▌")
+                    answer_text, hints, resources_json = stream.result()
                     resources = json.loads(resources_json) if resources_json else []
 
                     with placeholder.container():
@@ -490,9 +374,10 @@ Please analyze this content and provide insights, explanations, or answer any qu
                         student_name,
                         grade,
                         subject,
-                        combined_question,
+                        logged_question,
                         answer_text,
                         json.dumps(resources),
+                        document_text=extracted_text or None,
                     )
 
                     st.session_state.chat_history.insert(
@@ -511,28 +396,17 @@ Please analyze this content and provide insights, explanations, or answer any qu
     st.markdown("---")
     st.markdown("### 📊 Recent Interactions")
     with st.spinner("Loading recent interactions..."):
-        recent = get_recent_interactions(student_name, grade, limit=10)
+        recent, next_cursor, history_key = history_page(student_name, grade, "student")
     if not recent:
         st.info("No previous interactions yet. Ask your first question above!")
     else:
         for row in recent:
-            inter_id, q, a, resources, feedback, feedback_comment, created_at = row[:7]
+            inter_id, q, feedback, feedback_comment, created_at = row
+            q = q or ""
             with st.expander(
                 f"🕒 {created_at} — Q: {q[:60]}{'...' if len(q) > 60 else ''}"
             ):
-                st.markdown("**Answer:**")
-                st.write(a)
-
-                try:
-                    res_list = json.loads(resources) if resources else []
-                    if res_list:
-                        st.markdown("**📚 Resources:**")
-                        for r in res_list:
-                            st.write(
-                                f"- [{r.get('title','Resource')}]({r.get('link','#')})"
-                            )
-                except Exception:
-                    pass
+                show_answer_details(inter_id)
 
                 st.markdown("**👍👎 Feedback:**")
                 with st.form(key=f"feedback_form_{inter_id}"):
@@ -555,6 +429,7 @@ Please analyze this content and provide insights, explanations, or answer any qu
                         )
                         set_feedback(inter_id, feedback_score, comment)
                         st.success("✅ Feedback saved!")
+        history_nav(history_key, next_cursor)
 
     # ----------------- Quiz Section -----------------
     # Call the quiz component
@@ -562,6 +437,7 @@ Please analyze this content and provide insights, explanations, or answer any qu
     # get_quiz_questions(grade=grade, subject=subject)
 
     # ----------------- Gamification -----------------
+    # Only writes (buffered) on the first visit of a new day
     update_gamification(student_name, xp=0)
     gamification = get_gamification(student_name)
     badge_display = (
@@ -577,17 +453,10 @@ Please analyze this content and provide insights, explanations, or answer any qu
 
     # ----------------- Progress charts -----------------
     st.markdown("### 📈 Your Progress Overview")
+    # Always the latest interactions, whichever history page is open above
     df_student = pd.DataFrame(
-        recent,
-        columns=[
-            "id",
-            "question",
-            "answer",
-            "resources",
-            "feedback",
-            "comment",
-            "created_at",
-        ],
+        get_recent_activity(student_name, grade, PROGRESS_CHART_INTERACTIONS),
+        columns=["feedback", "created_at"],
     )
 
     if not df_student.empty:
@@ -597,14 +466,15 @@ Please analyze this content and provide insights, explanations, or answer any qu
         feedback_counts["feedback_text"] = feedback_counts["feedback"].replace(
             {1: "👍 Helpful", 0: "😐 Medium", -1: "👎 Not Helpful"}
         )
-        fig_student = px.pie(
-            feedback_counts,
-            names="feedback_text",
-            values="count",
-            title="Feedback Distribution for Your Questions",
-            hole=0.4,
-        )
-        st.plotly_chart(fig_student, use_container_width=True)
+        with span("plotly.feedback_pie"):
+            fig_student = px.pie(
+                feedback_counts,
+                names="feedback_text",
+                values="count",
+                title="Feedback Distribution for Your Questions",
+                hole=0.4,
+            )
+            st.plotly_chart(fig_student, use_container_width=True)
 
         df_student["created_at"] = pd.to_datetime(df_student["created_at"])
         df_student_sorted = (
@@ -612,13 +482,14 @@ Please analyze this content and provide insights, explanations, or answer any qu
             .size()
             .reset_index(name="Questions")
         )
-        fig_bar = px.bar(
-            df_student_sorted,
-            x="created_at",
-            y="Questions",
-            title="Questions Asked Over Time",
-        )
-        st.plotly_chart(fig_bar, use_container_width=True)
+        with span("plotly.questions_bar"):
+            fig_bar = px.bar(
+                df_student_sorted,
+                x="created_at",
+                y="Questions",
+                title="Questions Asked Over Time",
+            )
+            st.plotly_chart(fig_bar, use_container_width=True)
 
     weak_topics, topic_details = get_student_weak_topics(student_name, grade)
     st.markdown("### ⚠️ Weak Topics & Suggested Practice")
@@ -648,11 +519,7 @@ elif user_role == "Parent/Teacher":
     selected_grade = None
 
     # --- Fetch all students ---
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute("SELECT DISTINCT student, grade FROM interactions ORDER BY student")
-    all_students = c.fetchall()
-    conn.close()
+    all_students = get_dashboard_students()
 
     if all_students:
         # Select student + grade
@@ -685,66 +552,46 @@ elif user_role == "Parent/Teacher":
             else:
                 st.warning("⚠️ Please select a student first.")
 
+        # Activity, feedback and weak subjects all come from one query on
+        # the interaction_rollup table
+        summary = get_dashboard_summary(selected_student, selected_grade)
+
         # --- Activity by subject ---
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        c.execute(
-            """
-            SELECT subject, COUNT(*) 
-            FROM interactions
-            WHERE student = ? AND grade = ?
-            GROUP BY subject
-        """,
-            (selected_student, selected_grade),
-        )
-        data = c.fetchall()
-        conn.close()
+        data = [(subj, questions) for subj, questions, _, _, _ in summary]
 
         if data:
             df = pd.DataFrame(data, columns=["subject", "count"])
             df["count"] = df["count"].astype(int)
-            fig = px.bar(
-                df,
-                x="subject",
-                y="count",
-                title=f"📊 {selected_student}'s Learning Activity by Subject",
-                labels={"count": "Number of Questions", "subject": "Subject"},
-                color="count",
-                color_continuous_scale="Blues",
-            )
-            fig.update_layout(yaxis=dict(dtick=1))
-            st.plotly_chart(fig, use_container_width=True)
+            with span("plotly.activity_bar"):
+                fig = px.bar(
+                    df,
+                    x="subject",
+                    y="count",
+                    title=f"📊 {selected_student}'s Learning Activity by Subject",
+                    labels={"count": "Number of Questions", "subject": "Subject"},
+                    color="count",
+                    color_continuous_scale="Blues",
+                )
+                fig.update_layout(yaxis=dict(dtick=1))
+                st.plotly_chart(fig, use_container_width=True)
         else:
             st.info("📈 No interactions recorded for this student yet.")
 
         # --- Fetch recent interactions ---
-        recent_interactions = get_recent_interactions(
-            selected_student, selected_grade, limit=10
+        recent_interactions, next_cursor, history_key = history_page(
+            selected_student, selected_grade, "teacher"
         )
 
         if recent_interactions:
             st.markdown("### 📝 Recent Interactions")
             for row in recent_interactions:
-                inter_id, q, a, resources, feedback, feedback_comment, created_at = row[
-                    :7
-                ]
+                inter_id, q, feedback, feedback_comment, created_at = row
+                q = q or ""
                 with st.expander(
                     f"🕒 {created_at} — Q: {q[:60]}{'...' if len(q) > 60 else ''}"
                 ):
-                    st.markdown("**Answer:**")
-                    st.write(a)
-
-                    # Display resources
-                    try:
-                        res_list = json.loads(resources) if resources else []
-                        if res_list:
-                            st.markdown("**📚 Resources:**")
-                            for r in res_list:
-                                st.write(
-                                    f"- [{r.get('title','Resource')}]({r.get('link','#')})"
-                                )
-                    except Exception:
-                        pass
+                    # Answer and resources are fetched only when opened
+                    show_answer_details(inter_id)
 
                     # Display student feedback (read-only)
                     feedback_mapping = {
@@ -756,24 +603,18 @@ elif user_role == "Parent/Teacher":
                     st.write(f"{feedback_mapping.get(feedback, 'No Feedback')}")
                     if feedback_comment:
                         st.markdown(f"**Comment:** {feedback_comment}")
+            history_nav(history_key, next_cursor)
 
         else:
             st.info("📋 No recent interactions for this student.")
 
         # --- Feedback summary ---
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        c.execute(
-            """
-            SELECT feedback, COUNT(*)
-            FROM interactions
-            WHERE student = ? AND grade = ?
-            GROUP BY feedback
-        """,
-            (selected_student, selected_grade),
-        )
-        feedback_data = c.fetchall()
-        conn.close()
+        feedback_totals = {
+            1: sum(row[2] for row in summary),
+            -1: sum(row[3] for row in summary),
+            0: sum(row[4] for row in summary),
+        }
+        feedback_data = [(fb, count) for fb, count in feedback_totals.items() if count]
 
         if feedback_data:
             feedback_mapping = {1: "Helpful", -1: "Not Helpful", 0: "Neutral"}
@@ -785,31 +626,19 @@ elif user_role == "Parent/Teacher":
             df_feedback = pd.DataFrame(mapped_feedback, columns=["Feedback", "Count"])
             df_feedback["Count"] = df_feedback["Count"].astype(int)
 
-            fig_fb = px.pie(
-                df_feedback,
-                names="Feedback",
-                values="Count",
-                title=f"📊 Feedback Summary for {selected_student}",
-            )
-            st.plotly_chart(fig_fb, use_container_width=True)
+            with span("plotly.feedback_pie"):
+                fig_fb = px.pie(
+                    df_feedback,
+                    names="Feedback",
+                    values="Count",
+                    title=f"📊 Feedback Summary for {selected_student}",
+                )
+                st.plotly_chart(fig_fb, use_container_width=True)
         else:
             st.info("📊 No feedback available for this student.")
 
         # --- Weak subjects display ---
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        c.execute(
-            """
-            SELECT subject, COUNT(*) as total,
-                   SUM(CASE WHEN feedback = -1 THEN 1 ELSE 0 END) as wrong
-            FROM interactions
-            WHERE student = ? AND grade = ?
-            GROUP BY subject
-        """,
-            (selected_student, selected_grade),
-        )
-        topics = c.fetchall()
-        conn.close()
+        topics = [(subj, questions, not_helpful) for subj, questions, _, not_helpful, _ in summary]
 
         weak_topics = [
             subj for subj, total, wrong in topics if total > 0 and (wrong / total) > 0.3
@@ -841,6 +670,13 @@ st.sidebar.markdown(
 )
 st.sidebar.markdown("- **🎯 Subject-specific question filtering**")
 
+# ----------------- Performance panel -----------------
+st.sidebar.markdown("---")
+st.sidebar.checkbox("⏱️ Show performance panel", key="perf_panel")
+if perf:
+    perf_trace.end_rerun(perf)
+    show_perf_panel(perf)
+
 
 # # final code
 
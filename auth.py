@@ -1,38 +1,33 @@
 import sqlite3
 import streamlit as st
-
-DB_NAME = "student.db"
+from db_pool import connection, transaction
 
 
 # ----------------- DB SETUP -----------------
 def create_users_table():
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute(
-        """
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            email TEXT UNIQUE,
-            password TEXT,
-            role TEXT,
-            is_logged_in INTEGER DEFAULT 0
+    with transaction() as c:
+        c.execute(
+            """
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                email TEXT UNIQUE,
+                password TEXT,
+                role TEXT,
+                is_logged_in INTEGER DEFAULT 0
+            )
+            """
         )
-        """
-    )
-    conn.commit()
-    conn.close()
 
 
 # ----------------- LOGIN -----------------
 def login_user(email, password, role):
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute(
-        "SELECT * FROM users WHERE email=? AND password=? AND role=?",
-        (email, password, role),
-    )
-    user = c.fetchone()
-    conn.close()
+    with connection() as conn:
+        c = conn.cursor()
+        c.execute(
+            "SELECT * FROM users WHERE email=? AND password=? AND role=?",
+            (email, password, role),
+        )
+        user = c.fetchone()
     return user
 
 
@@ -54,41 +49,39 @@ def login_in_session(user):
 
 # ----------------- SIGNUP -----------------
 def signup_user(email, password, role):
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
     try:
-        c.execute(
-            "INSERT INTO users (email, password, role) VALUES (?, ?, ?)",
-            (email, password, role),
-        )
-        conn.commit()
+        with transaction() as c:
+            c.execute(
+                "INSERT INTO users (email, password, role) VALUES (?, ?, ?)",
+                (email, password, role),
+            )
         user_id = c.lastrowid
-        conn.close()
         return {"id": user_id, "email": email, "role": role}
     except sqlite3.IntegrityError:
-        conn.close()
         return None  # Email already exists
 
 
+# ----------------- LOGIN STATE -----------------
+def mark_logged_in(user_id):
+    with transaction() as c:
+        c.execute("UPDATE users SET is_logged_in=1 WHERE id=?", (user_id,))
+
+
 # ----------------- LOGOUT -----------------
 def logout_session():
     if st.session_state.get("user"):
         user_id = st.session_state.user["id"]
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        c.execute("UPDATE users SET is_logged_in=0 WHERE id=?", (user_id,))
-        conn.commit()
-        conn.close()
+        with transaction() as c:
+            c.execute("UPDATE users SET is_logged_in=0 WHERE id=?", (user_id,))
     st.session_state.logged_in = False
     st.session_state.user = None
 
 
 # ----------------- PERSISTENT LOGIN -----------------
 def persistent_login():
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute("SELECT * FROM users WHERE is_logged_in=1")
-    user = c.fetchone()
-    conn.close()
+    with connection() as conn:
+        c = conn.cursor()
+        c.execute("SELECT * FROM users WHERE is_logged_in=1")
+        user = c.fetchone()
     if user:
         login_in_session(user)
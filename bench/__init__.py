@@ -0,0 +1,2 @@
+# bench: reproducible benchmarks for the data and OCR hot paths.
+# Run `python -m bench.run --help` from the repository root.
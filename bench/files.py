@@ -0,0 +1,79 @@
+# bench/files.py generated upload files for FileProcessor.process_file
+import io
+
+PAGE_SIZE = (1240, 1754)  # A4 at 150 dpi
+FONT_SIZE = 28
+LINES_PER_PAGE = 30
+TEXT = (
+    "Photosynthesis converts light energy into chemical energy. "
+    "Solve 3x + 5 = 20 for x and check the answer."
+)
+
+
+class BenchUpload(io.BytesIO):
+    """Stands in for Streamlit's UploadedFile: bytes with a name and size"""
+
+    def __init__(self, name, data):
+        super().__init__(data)
+        self.name = name
+        self.size = len(data)
+
+
+def _page_image(page):
+    from PIL import Image, ImageDraw, ImageFont
+
+    image = Image.new("RGB", PAGE_SIZE, "white")
+    draw = ImageDraw.Draw(image)
+    try:
+        font = ImageFont.load_default(size=FONT_SIZE)
+    except TypeError:  # Pillow < 10.1 has a single fixed-size default font
+        font = ImageFont.load_default()
+    for line in range(LINES_PER_PAGE):
+        draw.text((60, 60 + line * 52), f"{page}.{line + 1} {TEXT}"[:70], fill="black", font=font)
+    return image
+
+
+def image_upload(name="scan.png"):
+    buffer = io.BytesIO()
+    _page_image(1).save(buffer, format="PNG")
+    return name, buffer.getvalue()
+
+
+def scanned_pdf_upload(pages, name="scan.pdf"):
+    """Image-only PDF: every page needs OCR"""
+    images = [_page_image(page) for page in range(1, pages + 1)]
+    buffer = io.BytesIO()
+    images[0].save(buffer, format="PDF", save_all=True, append_images=images[1:], resolution=150)
+    return name, buffer.getvalue()
+
+
+def text_pdf_upload(pages, name="text.pdf"):
+    """PDF with a text layer on every page: no OCR needed"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in range(1, pages + 1):
+        lines = "".join(
+            f"({page}.{line + 1} {TEXT[:80]}) Tj 0 -14 Td " for line in range(LINES_PER_PAGE)
+        )
+        stream = f"BT /F1 10 Tf 40 800 Td {lines}ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        content_id = len(objects)
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>"
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return name, out.getvalue()
@@ -0,0 +1,189 @@
+# bench/import_cost.py startup import cost of the app and its heavy libraries
+"""
+Measures what each module costs to import, using `python -X importtime` in
+a fresh interpreter per measurement so nothing is already cached.
+
+  python -m bench.import_cost
+  python -m bench.import_cost --repeat 5 --output bench/import_cost.json
+
+The report has three parts:
+  startup   app.py's own top-level imports, in order, as a cold start runs them
+  deferred  libraries in LAZY_LIBS that the startup imports still pull in
+  modules   cold import time of each app module and heavy library on its own
+"""
+import argparse
+import ast
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_MODULES = [
+    "perf_trace",
+    "lazy_imports",
+    "db_pool",
+    "auth",
+    "student_db",
+    "student_utils",
+    "gamification_service",
+    "subject_classifier",
+    "llm_client",
+    "tutor_engine",
+    "quiz_db",
+    "quiz_logic",
+    "documents",
+    "file_handler",
+    "weekly_email",
+]
+HEAVY_LIBS = [
+    "streamlit",
+    "openai",
+    "numpy",
+    "pandas",
+    "plotly.express",
+    "PIL.Image",
+    "pytesseract",
+    "pdf2image",
+    "pypdf",
+    "docx",
+]
+# loaded through lazy_imports on first use; none of these should show up
+# in the startup measurement
+LAZY_LIBS = ["pandas", "plotly.express", "PIL.Image", "pytesseract", "pdf2image", "pypdf", "docx"]
+IMPORTTIME_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def parse_importtime(stderr):
+    """{module: cumulative ms} for every module -X importtime reported"""
+    cumulative = {}
+    for line in stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            cumulative[match.group(4)] = int(match.group(2)) / 1000
+    return cumulative
+
+
+def _run_importtime(code):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    return result.stdout, parse_importtime(result.stderr)
+
+
+def module_cost(name):
+    """Cumulative ms to import `name` cold, or None if it cannot be imported"""
+    stdout, cumulative = _run_importtime(
+        f"try:\n    import {name}\nexcept Exception as e:\n    print(type(e).__name__, e)"
+    )
+    if stdout.strip():
+        return None
+    # a dotted name is reported under its full name, after its parents
+    return cumulative.get(name)
+
+
+def startup_imports(path=os.path.join(ROOT, "app.py")):
+    """Module names app.py imports at the top level, in source order"""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    names = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            found = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            found = [node.module]
+        else:
+            continue
+        names.extend(name for name in found if name not in names)
+    return names
+
+
+def startup_cost(names):
+    """
+    Import `names` in order in one interpreter, as app.py does.
+    Returns ({name: ms or None if it failed}, {module: ms} of everything loaded).
+    """
+    lines = ["import json, sys, time", "costs = {}"]
+    for name in names:
+        lines += [
+            "start = time.perf_counter()",
+            "try:",
+            f"    import {name}",
+            f"    costs[{name!r}] = (time.perf_counter() - start) * 1000",
+            "except Exception:",
+            f"    costs[{name!r}] = None",
+        ]
+    lines.append("print(json.dumps(costs))")
+    stdout, cumulative = _run_importtime("\n".join(lines))
+    return json.loads(stdout.strip().splitlines()[-1]), cumulative
+
+
+def _median(values):
+    values = [v for v in values if v is not None]
+    return round(statistics.median(values), 2) if values else None
+
+
+def run(repeat):
+    names = startup_imports()
+    startup_runs = [startup_cost(names) for _ in range(repeat)]
+    startup = {name: _median([costs[name] for costs, _ in startup_runs]) for name in names}
+    loaded = startup_runs[-1][1]
+    deferred = {lib: round(loaded[lib], 2) for lib in LAZY_LIBS if lib in loaded}
+    modules = {}
+    for name in APP_MODULES + HEAVY_LIBS:
+        modules[name] = _median([module_cost(name) for _ in range(repeat)])
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "repeat": repeat,
+        },
+        "startup": startup,
+        "startup_total_ms": round(sum(v for v in startup.values() if v is not None), 2),
+        "deferred": deferred,
+        "modules": modules,
+    }
+
+
+def _ms(value):
+    return f"{value:>10.1f}" if value is not None else f"{'failed':>10}"
+
+
+def print_report(report):
+    print("Startup imports of app.py (ms, in order)")
+    for name, ms in report["startup"].items():
+        print(f"  {name:<24}{_ms(ms)}")
+    print(f"  {'total':<24}{report['startup_total_ms']:>10.1f}")
+    if report["deferred"]:
+        print("\nLazy libraries still imported at startup")
+        for name, ms in report["deferred"].items():
+            print(f"  {name:<24}{ms:>10.1f}")
+    else:
+        print("\nNo lazy library is imported at startup")
+    print("\nCold import of each module on its own (ms)")
+    for name, ms in sorted(report["modules"].items(), key=lambda item: -(item[1] or 0)):
+        print(f"  {name:<24}{_ms(ms)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="fresh interpreters per measurement")
+    parser.add_argument("--output", help="also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = run(args.repeat)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+# bench/load.py concurrent simulated students against the tutor and quiz paths
+"""
+Drives EnhancedAITutor.ask_tutor_sync and get_quiz_questions from N
+concurrent simulated students and reports p50/p95/p99 latency and
+throughput per operation.
+
+By default a mock LLM (bench.mock_llm) is started in a subprocess and the
+app's databases are created fresh in a scratch directory, so nothing leaves
+the machine and the real student.db/quiz.db are untouched.
+
+  python -m bench.load --students 20 --duration 60
+  python -m bench.load --students 50 --requests 10 --quiz-ratio 0.3 --error-rate 0.02
+  python -m bench.load --base-url http://127.0.0.1:8400/v1   # mock already running
+"""
+import argparse
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from datetime import datetime, timezone
+
+SUBJECTS = ["Math", "Science", "English"]
+GRADES = ["6", "7", "8"]
+QUIZ_LIMIT = 3
+MOCK_START_TIMEOUT = 10.0
+REFILL_DRAIN_TIMEOUT = 60.0
+TUTOR_QUESTIONS = {
+    "Math": "How do I solve {n}x + {m} = {k} step by step?",
+    "Science": "Why does a {n} kg object fall at the same speed as a {m} kg one?",
+    "English": "What is the main idea of paragraph {n} and how does the author use metaphor {m}?",
+}
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(q / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(samples, elapsed):
+    """{op: stats} from [(op, seconds, ok)] collected over `elapsed` seconds"""
+    report = {}
+    for op in sorted({s[0] for s in samples}) + ["all"]:
+        rows = [s for s in samples if op == "all" or s[0] == op]
+        latencies = sorted(s[1] * 1000 for s in rows if s[2])
+        report[op] = {
+            "requests": len(rows),
+            "errors": sum(1 for s in rows if not s[2]),
+            "throughput_rps": round(len(rows) / elapsed, 3) if elapsed else None,
+            **{
+                f"p{q}_ms": round(percentile(latencies, q), 2) if latencies else None
+                for q in (50, 95, 99)
+            },
+            "max_ms": round(latencies[-1], 2) if latencies else None,
+        }
+    return report
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_mock(args):
+    """Run bench.mock_llm in a subprocess; returns (process, base_url)"""
+    port = _free_port()
+    command = [
+        sys.executable, "-m", "bench.mock_llm",
+        "--port", str(port),
+        "--latency-ms", str(args.latency_ms),
+        "--jitter-ms", str(args.jitter_ms),
+        "--tokens-per-second", str(args.tokens_per_second),
+        "--error-rate", str(args.error_rate),
+        "--error-status", str(args.error_status),
+    ]
+    process = subprocess.Popen(command, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + MOCK_START_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"{base}/stats", timeout=1).read()
+            return process, f"{base}/v1"
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("mock LLM server did not start")
+
+
+def mock_stats(base_url):
+    try:
+        root = re.sub(r"/v1/?$", "", base_url)
+        return json.loads(urllib.request.urlopen(f"{root}/stats", timeout=2).read())
+    except (OSError, ValueError):
+        return None
+
+
+class Student(threading.Thread):
+    """One simulated student issuing tutor questions and quiz requests in a loop"""
+
+    def __init__(self, index, args, ops, samples, samples_lock, stop_at):
+        super().__init__(daemon=True)
+        self.name = f"Load Student {index:04d}"
+        self.rng = random.Random(args.seed * 100003 + index)
+        self.args = args
+        self.ops = ops
+        self.samples = samples
+        self.samples_lock = samples_lock
+        self.stop_at = stop_at
+        self.grade = self.rng.choice(GRADES)
+
+    def run(self):
+        done = 0
+        while time.monotonic() < self.stop_at and (not self.args.requests or done < self.args.requests):
+            op = "quiz" if self.rng.random() < self.args.quiz_ratio else "tutor"
+            subject = self.rng.choice(SUBJECTS)
+            start = time.perf_counter()
+            try:
+                ok = self.ops[op](self, subject)
+            except Exception as e:
+                print(f"{self.name} {op} failed: {e}")
+                ok = False
+            elapsed = time.perf_counter() - start
+            with self.samples_lock:
+                self.samples.append((op, elapsed, ok))
+            done += 1
+            if self.args.think_ms:
+                time.sleep(self.rng.uniform(0.5, 1.5) * self.args.think_ms / 1000)
+
+
+def tutor_op(student, subject):
+    """ask_tutor_sync; a unique question each time unless --repeat-questions"""
+    from tutor_engine import ask_tutor_sync
+
+    n = student.rng.randrange(2, 9) if student.args.repeat_questions else student.rng.randrange(2, 10**6)
+    question = TUTOR_QUESTIONS[subject].format(n=n, m=n + 3, k=2 * n + 5)
+    _, _, resources_json = ask_tutor_sync(question, subject, f"Grade {student.grade}", student.name)
+    # error_response() is the only path that returns no resources
+    return json.loads(resources_json or "[]") != []
+
+
+def quiz_op(student, subject):
+    from quiz_logic import get_quiz_questions
+
+    return len(get_quiz_questions(student.grade, subject, QUIZ_LIMIT)) == QUIZ_LIMIT
+
+
+def run(args):
+    """Run the load and return the report dict"""
+    mock = None
+    base_url = args.base_url
+    if not base_url:
+        mock, base_url = start_mock(args)
+    # llm_client and the tutor read these when they are first imported
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ.setdefault("OPENAI_API_KEY", "mock")
+
+    # Fresh databases in a scratch directory; db_pool opens them relative
+    # to the working directory, and background refills keep writing there
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="tutor-load-")
+    os.makedirs(work_dir, exist_ok=True)
+    os.chdir(work_dir)
+    print(f"Databases in {work_dir}, LLM at {base_url}")
+
+    try:
+        import student_db
+        from gamification_service import flush_gamification
+        from llm_client import close_clients
+        from quiz_db import init_quiz_db
+
+        student_db.init_db()
+        init_quiz_db()
+        ops = {"tutor": tutor_op, "quiz": quiz_op}
+        # import before the clock starts so the first requests don't pay for it
+        import tutor_engine  # noqa: F401
+        if args.quiz_ratio > 0:
+            import quiz_logic
+
+        samples = []
+        samples_lock = threading.Lock()
+        started = time.monotonic()
+        stop_at = started + args.duration if args.duration else float("inf")
+        students = [
+            Student(i, args, ops, samples, samples_lock, stop_at) for i in range(args.students)
+        ]
+        for student in students:
+            student.start()
+        for student in students:
+            student.join()
+        elapsed = time.monotonic() - started
+        flush_gamification()
+        if args.quiz_ratio > 0:
+            # let background refills finish so nothing is mid-request at exit
+            quiz_logic.question_bank.wait_for_refills(REFILL_DRAIN_TIMEOUT)
+        close_clients()
+
+        return {
+            "meta": {
+                "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "students": args.students,
+                "duration_s": round(elapsed, 3),
+                "quiz_ratio": args.quiz_ratio,
+                "base_url": base_url,
+                "mock": None
+                if args.base_url
+                else {
+                    "latency_ms": args.latency_ms,
+                    "jitter_ms": args.jitter_ms,
+                    "tokens_per_second": args.tokens_per_second,
+                    "error_rate": args.error_rate,
+                    "error_status": args.error_status,
+                },
+                "server_stats": mock_stats(base_url),
+            },
+            "results": summarize(samples, elapsed),
+        }
+    finally:
+        if mock is not None:
+            mock.terminate()
+            mock.wait(timeout=5)
+
+
+def print_report(report):
+    meta = report["meta"]
+    print(f"\n{meta['students']} students for {meta['duration_s']:.1f}s")
+    print(f"{'op':<8}{'requests':>10}{'errors':>8}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for op, r in report["results"].items():
+        cells = [
+            f"{r[k]:>10.1f}" if r[k] is not None else f"{'-':>10}"
+            for k in ("p50_ms", "p95_ms", "p99_ms")
+        ]
+        print(f"{op:<8}{r['requests']:>10}{r['errors']:>8}{r['throughput_rps']:>9.2f}{''.join(cells)}")
+    if meta["server_stats"]:
+        print(f"LLM server: {meta['server_stats']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=10, help="concurrent simulated students")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds (0 = until --requests)")
+    parser.add_argument("--requests", type=int, default=0, help="requests per student (0 = unlimited)")
+    parser.add_argument("--quiz-ratio", type=float, default=0.2, help="share of quiz requests")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="mean pause between requests")
+    parser.add_argument("--repeat-questions", action="store_true", help="allow answer cache hits")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--base-url", help="use a running OpenAI-compatible server instead of the mock")
+    parser.add_argument("--work-dir", help="directory for the scratch databases")
+    parser.add_argument("--output", help="also write the report as JSON")
+    mock = parser.add_argument_group("mock server")
+    mock.add_argument("--latency-ms", type=float, default=300.0)
+    mock.add_argument("--jitter-ms", type=float, default=100.0)
+    mock.add_argument("--tokens-per-second", type=float, default=50.0)
+    mock.add_argument("--error-rate", type=float, default=0.0)
+    mock.add_argument("--error-status", type=int, default=500)
+    args = parser.parse_args(argv)
+    if not args.duration and not args.requests:
+        parser.error("set --duration or --requests")
+
+    output = os.path.abspath(args.output) if args.output else None
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    report = run(args)
+    print_report(report)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+# bench/mock_llm.py local OpenAI-compatible chat completions stub
+"""
+Serves POST /v1/chat/completions (streaming and non-streaming) with
+configurable latency, token rate and error injection, so the tutor and quiz
+paths can be load tested without network access or API spend.
+
+  python -m bench.mock_llm --port 8400 --latency-ms 400 --tokens-per-second 60
+  OPENAI_BASE_URL=http://127.0.0.1:8400/v1 OPENAI_API_KEY=mock streamlit run app.py
+
+GET /stats returns request and error counts as JSON.
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+QUIZ_PROMPT_RE = re.compile(r"Generate (\d+) multiple-choice quiz questions for (.+?) in (\w+)")
+TOKEN_RE = re.compile(r"\S+\s*|\s+")
+TUTOR_ANSWER = (
+    "## 🎯 Understanding the Question\n"
+    "Let's break this down step by step so every part makes sense.\n\n"
+    "## 📝 Step-by-Step Explanation\n"
+    "1. First, identify what the question is asking.\n"
+    "2. Next, write down what you already know.\n"
+    "3. Then apply the rule to get the answer.\n\n"
+    "## 💡 Hints\n"
+    "- Try a simpler example first\n"
+    "- Check your answer by working backwards\n\n"
+    "## 🤔 Practice Question\n"
+    "Can you try a similar problem on your own?\n"
+)
+
+
+class MockSettings:
+    def __init__(
+        self,
+        latency_ms=300.0,
+        jitter_ms=100.0,
+        tokens_per_second=50.0,
+        error_rate=0.0,
+        error_status=500,
+        answer_tokens=None,
+        seed=None,
+    ):
+        self.latency_ms = latency_ms  # before the first byte of the response
+        self.jitter_ms = jitter_ms  # uniform +/- around latency_ms
+        self.tokens_per_second = tokens_per_second  # 0 = no generation delay
+        self.error_rate = error_rate  # share of requests answered with error_status
+        self.error_status = error_status
+        self.answer_tokens = answer_tokens  # pad/trim tutor answers to this many tokens
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.stats = {"requests": 0, "streamed": 0, "errors": 0, "tokens": 0}
+        self.stats_lock = threading.Lock()
+
+    def count(self, **increments):
+        with self.stats_lock:
+            for name, value in increments.items():
+                self.stats[name] += value
+
+    def random(self):
+        with self.rng_lock:
+            return self.rng.random()
+
+
+def quiz_content(count, grade, subject, settings):
+    """A JSON array of `count` questions, unique across calls so the bank keeps them"""
+    questions = []
+    for i in range(1, count + 1):
+        token = uuid.uuid4().hex[:8]
+        a, b = int(settings.random() * 50) + 1, int(settings.random() * 50) + 1
+        options = [str(a + b), str(a + b + 1), str(a + b - 1)]
+        questions.append(
+            {
+                "id": i,
+                "question": f"{grade} {subject} check {token}: what is {a} + {b}?",
+                "options": options,
+                "correct": options[0],
+            }
+        )
+    return "```json\n" + json.dumps(questions, indent=2) + "\n```"
+
+
+def tutor_content(settings):
+    tokens = TOKEN_RE.findall(TUTOR_ANSWER)
+    if settings.answer_tokens:
+        tokens = (tokens * (settings.answer_tokens // len(tokens) + 1))[: settings.answer_tokens]
+    return "".join(tokens)
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    settings = MockSettings()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body, headers=()):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _write_chunk(self, text):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            with self.settings.stats_lock:
+                self._send_json(200, dict(self.settings.stats))
+        elif self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "gpt-4o-mini", "object": "model"}]})
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        settings = self.settings
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": {"message": "invalid JSON body"}})
+            return
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+
+        settings.count(requests=1)
+        delay = settings.latency_ms + (settings.random() * 2 - 1) * settings.jitter_ms
+        time.sleep(max(0.0, delay) / 1000)
+
+        if settings.random() < settings.error_rate:
+            settings.count(errors=1)
+            headers = [("Retry-After", "0")] if settings.error_status == 429 else []
+            self._send_json(
+                settings.error_status,
+                {"error": {"message": "injected error", "type": "mock_error"}},
+                headers,
+            )
+            return
+
+        prompt = " ".join(str(m.get("content", "")) for m in request.get("messages", []))
+        quiz = QUIZ_PROMPT_RE.search(prompt)
+        if quiz:
+            content = quiz_content(int(quiz.group(1)), quiz.group(2), quiz.group(3), settings)
+        else:
+            content = tutor_content(settings)
+        tokens = TOKEN_RE.findall(content)
+        settings.count(tokens=len(tokens))
+        model = request.get("model", "gpt-4o-mini")
+        completion_id = f"chatcmpl-mock-{uuid.uuid4().hex[:12]}"
+        token_delay = 1 / settings.tokens_per_second if settings.tokens_per_second else 0
+
+        if not request.get("stream"):
+            time.sleep(token_delay * len(tokens))
+            self._send_json(
+                200,
+                {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": content},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": {
+                        "prompt_tokens": len(TOKEN_RE.findall(prompt)),
+                        "completion_tokens": len(tokens),
+                        "total_tokens": len(TOKEN_RE.findall(prompt)) + len(tokens),
+                    },
+                },
+            )
+            return
+
+        settings.count(streamed=1)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def event(delta, finish_reason=None):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n")
+
+        try:
+            event({"role": "assistant", "content": ""})
+            for token in tokens:
+                if token_delay:
+                    time.sleep(token_delay)
+                event({"content": token})
+            event({}, "stop")
+            self._write_chunk("data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # clients drop keep-alive connections and abandon streams; not errors
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+def make_server(port=0, host="127.0.0.1", **settings):
+    """A configured server (not yet serving); port 0 picks a free port"""
+    handler = type("ConfiguredMockLLMHandler", (MockLLMHandler,), {"settings": MockSettings(**settings)})
+    return MockLLMServer((host, port), handler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8400)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--jitter-ms", type=float, default=100.0)
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--answer-tokens", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    server = make_server(
+        args.port,
+        args.host,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        answer_tokens=args.answer_tokens,
+        seed=args.seed,
+    )
+    host, port = server.server_address[:2]
+    print(f"Mock LLM listening on http://{host}:{port}/v1", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
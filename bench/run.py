@@ -0,0 +1,365 @@
+# bench/run.py time the data and OCR hot paths against seeded databases
+"""
+Benchmark the student.db queries, gamification writes, subject compliance
+check and file extraction at 10k/100k/1M seeded interactions.
+
+  python -m bench.run
+  python -m bench.run --rows 10000 --repeat 50 --compare bench/baseline.json
+
+Results are written as JSON so later runs can be compared with --compare.
+"""
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import gamification_service
+import student_db
+import weekly_email
+from db_pool import close_connections, connection
+from student_utils import get_student_weak_topics
+from subject_classifier import check_subject_compliance, refresh_classifier
+
+from bench import files
+from bench.seed import SEED, seed_student_db, student_names
+
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000]
+DEFAULT_REPEAT = 20
+DEFAULT_OUTPUT = "bench/results.json"
+DEFAULT_DATA_DIR = "bench/data"
+HISTORY_PAGES = 5  # pages walked by the deep-history case
+SCANNED_PDF_PAGES = 4
+TEXT_PDF_PAGES = 20
+COMPLIANCE_QUESTIONS = [
+    "Solve 3x + 5 = 20 and explain each step",
+    "What does photosynthesis produce in a plant cell?",
+    "Find the main idea and a metaphor in this paragraph",
+    "Explain the equation for the force of gravity on a planet",
+]
+
+
+def measure(fn, repeat, warmup=1):
+    """Call fn() warmup + repeat times; latency stats of the timed calls in ms"""
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "n": repeat,
+        "min_ms": round(timings[0], 4),
+        "median_ms": round(statistics.median(timings), 4),
+        "p95_ms": round(timings[min(len(timings) - 1, int(0.95 * len(timings)))], 4),
+        "mean_ms": round(statistics.fmean(timings), 4),
+    }
+
+
+def cycle(values):
+    """fn() returning the next value on every call, round robin"""
+    state = {"i": -1}
+
+    def next_value():
+        state["i"] = (state["i"] + 1) % len(values)
+        return values[state["i"]]
+
+    return next_value
+
+
+# ----------------------------
+# Cases
+# ----------------------------
+# Each case is (name, setup) where setup(rows) returns the fn to time.
+# Students are sampled evenly across the seeded population.
+
+
+GRADES_BY_NAME = {}  # seeded student -> grade, loaded per database
+
+
+def _load_grades():
+    with connection() as conn:
+        rows = conn.execute("SELECT DISTINCT student, grade FROM interactions").fetchall()
+    GRADES_BY_NAME.clear()
+    GRADES_BY_NAME.update(rows)
+
+
+def _students(rows, count=50):
+    names = [name for name in student_names(rows) if name in GRADES_BY_NAME]
+    step = max(1, len(names) // count)
+    return [(name, GRADES_BY_NAME[name]) for name in names[::step][:count]]
+
+
+def case_history_first_page(rows):
+    pick = cycle(_students(rows))
+
+    def run():
+        student_db.get_interaction_page(*pick())
+
+    return run
+
+
+def case_history_deep_pages(rows):
+    pick = cycle(_students(rows))
+
+    def run():
+        student, grade = pick()
+        cursor = None
+        for _ in range(HISTORY_PAGES):
+            _, cursor = student_db.get_interaction_page(student, grade, cursor=cursor)
+            if cursor is None:
+                break
+
+    return run
+
+
+def case_weak_topics(rows):
+    pick = cycle(_students(rows))
+    return lambda: get_student_weak_topics(*pick())
+
+
+def case_weekly_summary(rows):
+    pick = cycle(_students(rows))
+    return lambda: weekly_email.get_weekly_summary(*pick())
+
+
+def case_weekly_summaries_all(rows):
+    return weekly_email.get_weekly_summaries
+
+
+def case_dashboard_students(rows):
+    return student_db.get_dashboard_students
+
+
+def case_dashboard_summary(rows):
+    pick = cycle(_students(rows))
+    return lambda: student_db.get_dashboard_summary(*pick())
+
+
+def case_update_gamification_db(rows):
+    """Direct upsert, one transaction per event"""
+    pick = cycle(_students(rows))
+    return lambda: student_db.update_gamification(pick()[0], xp=10)
+
+
+def case_update_gamification_service(rows):
+    """Cached service: most calls are in memory, every batch_size-th flushes"""
+    pick = cycle(_students(rows))
+    return lambda: gamification_service.update_gamification(pick()[0], xp=10)
+
+
+def case_subject_compliance(rows):
+    pick = cycle(COMPLIANCE_QUESTIONS)
+    return lambda: check_subject_compliance(pick(), "Math")
+
+
+def case_classifier_training(rows):
+    return refresh_classifier
+
+
+DB_CASES = [
+    ("history_first_page", case_history_first_page),
+    ("history_deep_pages", case_history_deep_pages),
+    ("weak_topics", case_weak_topics),
+    ("weekly_summary", case_weekly_summary),
+    ("weekly_summaries_all", case_weekly_summaries_all),
+    ("dashboard_students", case_dashboard_students),
+    ("dashboard_summary", case_dashboard_summary),
+    ("update_gamification_db", case_update_gamification_db),
+    ("update_gamification_service", case_update_gamification_service),
+    ("subject_compliance", case_subject_compliance),
+    ("classifier_training", case_classifier_training),
+]
+
+
+def _file_cases():
+    """[(name, make_upload)] for FileProcessor.process_file"""
+    return [
+        ("process_file_image", files.image_upload),
+        ("process_file_scanned_pdf", lambda: files.scanned_pdf_upload(SCANNED_PDF_PAGES)),
+        ("process_file_text_pdf", lambda: files.text_pdf_upload(TEXT_PDF_PAGES)),
+    ]
+
+
+def run_file_cases(repeat, selected):
+    """
+    Cold runs use an empty extraction cache each time; the cached case
+    measures a repeat upload of the same bytes.
+    Returns results, with a skipped entry per case when the OCR stack
+    (pytesseract, pdf2image, Pillow, poppler, tesseract) is not available.
+    """
+    cases = [c for c in _file_cases() if selected(c[0])]
+    if not cases:
+        return []
+    try:
+        from file_handler import ExtractionCache, FileProcessor
+    except ImportError as e:
+        return [{"case": name, "skipped": f"file_handler unavailable: {e}"} for name, _ in cases]
+
+    results = []
+    with tempfile.TemporaryDirectory() as cache_root:
+        for name, make_upload in cases:
+            try:
+                file_name, data = make_upload()
+            except ImportError as e:
+                results.append({"case": name, "skipped": f"cannot generate file: {e}"})
+                continue
+            runs = {"n": 0}
+
+            def cold():
+                runs["n"] += 1
+                cache = ExtractionCache(cache_dir=os.path.join(cache_root, f"{name}-{runs['n']}"))
+                text, info = FileProcessor(cache).process_file(files.BenchUpload(file_name, data))
+                if not text:
+                    raise RuntimeError(info)
+
+            warm_processor = FileProcessor(
+                ExtractionCache(cache_dir=os.path.join(cache_root, f"{name}-warm"))
+            )
+
+            def warm():
+                warm_processor.process_file(files.BenchUpload(file_name, data))
+
+            try:
+                results.append({"case": name, "bytes": len(data), **measure(cold, repeat)})
+                results.append({"case": f"{name}_cached", **measure(warm, repeat)})
+            except Exception as e:
+                results.append({"case": name, "skipped": f"{type(e).__name__}: {e}"})
+    return results
+
+
+# ----------------------------
+# Runner
+# ----------------------------
+
+
+def seeded_copy(rows, data_dir, work_dir, reseed=False):
+    """
+    Copy of the seeded database for `rows` into work_dir. Seeded databases
+    are kept in data_dir and rebuilt only with reseed (or a new SEED), so
+    every run starts from the same bytes.
+    """
+    seed_dir = os.path.join(data_dir, f"{rows}-{SEED}")
+    source = os.path.join(seed_dir, "student.db")
+    if reseed or not os.path.exists(source):
+        start = time.perf_counter()
+        seed_student_db(seed_dir, rows)
+        print(f"Seeded {rows:,} interactions in {time.perf_counter() - start:.1f}s")
+    os.makedirs(work_dir, exist_ok=True)
+    shutil.copyfile(source, os.path.join(work_dir, "student.db"))
+
+
+def run_db_cases(rows, repeat, selected):
+    results = []
+    _load_grades()
+    for name, setup in DB_CASES:
+        if not selected(name):
+            continue
+        # the classifier and the gamification cache are per process; start
+        # every case from the freshly copied database
+        refresh_classifier()
+        gamification_service.gamification_service._rows.clear()
+        case_repeat = max(3, repeat // 5) if name == "classifier_training" else repeat
+        results.append({"case": name, "rows": rows, **measure(setup(rows), case_repeat)})
+        gamification_service.flush_gamification()
+        print(f"  {name:<32} median {results[-1]['median_ms']:>10.3f} ms")
+    return results
+
+
+def run(rows_list, repeat, data_dir, reseed=False, pattern="*"):
+    def selected(name):
+        return fnmatch.fnmatch(name, pattern)
+
+    results = []
+    cwd = os.getcwd()
+    data_dir = os.path.abspath(data_dir)
+    for rows in rows_list:
+        print(f"{rows:,} interactions")
+        with tempfile.TemporaryDirectory() as work_dir:
+            seeded_copy(rows, data_dir, work_dir, reseed)
+            # db_pool opens student.db relative to the working directory
+            os.chdir(work_dir)
+            close_connections()
+            try:
+                results.extend(run_db_cases(rows, repeat, selected))
+            finally:
+                close_connections()
+                os.chdir(cwd)
+    results.extend(run_file_cases(repeat, selected))
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(path, results, args):
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": sys.version.split()[0],
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "seed": SEED,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(results)} results to {path}")
+
+
+def compare(results, baseline_path):
+    """Print median latency against a previous results file"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {
+            (r["case"], r.get("rows")): r for r in json.load(f)["results"] if "median_ms" in r
+        }
+    print(f"\nMedian vs {baseline_path}")
+    for r in results:
+        old = baseline.get((r["case"], r.get("rows")))
+        if "median_ms" not in r or old is None:
+            continue
+        ratio = r["median_ms"] / old["median_ms"] if old["median_ms"] else float("inf")
+        label = f"{r['case']} @ {r['rows']:,}" if r.get("rows") else r["case"]
+        print(f"  {label:<44} {old['median_ms']:>10.3f} -> {r['median_ms']:>10.3f} ms  ({ratio:.2f}x)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--cases", default="*", help="fnmatch pattern of case names")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    parser.add_argument("--reseed", action="store_true", help="rebuild the seeded databases")
+    parser.add_argument("--compare", metavar="BASELINE", help="earlier results file")
+    args = parser.parse_args(argv)
+
+    results = run(args.rows, args.repeat, args.data_dir, args.reseed, args.cases)
+    write_results(args.output, results, args)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
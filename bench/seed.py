@@ -0,0 +1,111 @@
+# bench/seed.py synthetic student.db contents at a given size
+import os
+import random
+from datetime import datetime, timedelta, timezone
+
+import student_db
+from db_pool import TIMESTAMP_FORMAT, close_connections, transaction
+from migrations import ROLLUP_BACKFILL_SQL
+from subject_classifier import SUBJECT_KEYWORDS
+
+SEED = 20240917  # fixed so every run builds the same database
+ROWS_PER_STUDENT = 50
+GRADES = ["Grade 6", "Grade 7", "Grade 8"]
+SUBJECTS = ["Math", "Science", "English", "General"]
+HISTORY_DAYS = 60
+INSERT_BATCH = 20000
+
+# Feedback mix: helpful, not helpful, unrated
+FEEDBACK_WEIGHTS = {1: 0.5, -1: 0.2, 0: 0.3}
+
+QUESTION_TEMPLATES = [
+    "Can you explain {a} and how it relates to {b}?",
+    "I don't understand {a}. What is an example of {b}?",
+    "How do I use {a} when I have {b}?",
+    "What is the difference between {a} and {b}?",
+]
+GENERAL_WORDS = ["homework", "study tips", "exam", "notes", "time", "practice"]
+ANSWER = "Here is a step-by-step explanation with an example. " * 8
+
+INSERT_SQL = """
+    INSERT INTO interactions
+    (student, grade, subject, question, answer, resources, feedback, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def student_names(rows):
+    return [f"Student {i:06d}" for i in range(max(1, rows // ROWS_PER_STUDENT))]
+
+
+def _question(rng, subject):
+    words = SUBJECT_KEYWORDS.get(subject) or GENERAL_WORDS
+    a, b = rng.sample(list(words), 2) if len(words) > 1 else (words[0], words[0])
+    return rng.choice(QUESTION_TEMPLATES).format(a=a, b=b)
+
+
+def _interactions(rng, rows, students, now):
+    feedback_values = list(FEEDBACK_WEIGHTS)
+    feedback_weights = list(FEEDBACK_WEIGHTS.values())
+    student_grade = {s: rng.choice(GRADES) for s in students}
+    span = HISTORY_DAYS * 24 * 3600
+    for _ in range(rows):
+        student = rng.choice(students)
+        subject = rng.choice(SUBJECTS)
+        created_at = now - timedelta(seconds=rng.randrange(span))
+        yield (
+            student,
+            student_grade[student],
+            subject,
+            _question(rng, subject),
+            ANSWER,
+            "[]",
+            rng.choices(feedback_values, feedback_weights)[0],
+            created_at.strftime(TIMESTAMP_FORMAT),
+        )
+
+
+def seed_student_db(directory, rows, seed=SEED):
+    """
+    Build directory/student.db with `rows` interactions plus one gamification
+    row per student, on the current schema. Returns the database path.
+    Timestamps spread over the HISTORY_DAYS before now, so the weekly reports
+    always see about a ninth of the rows.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, "student.db")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    cwd = os.getcwd()
+    os.chdir(directory)
+    close_connections()
+    try:
+        student_db.init_db()
+        rng = random.Random(seed)
+        students = student_names(rows)
+        now = datetime.now(timezone.utc)
+        batch = []
+        with transaction() as c:
+            for row in _interactions(rng, rows, students, now):
+                batch.append(row)
+                if len(batch) == INSERT_BATCH:
+                    c.executemany(INSERT_SQL, batch)
+                    batch = []
+            if batch:
+                c.executemany(INSERT_SQL, batch)
+            c.execute(ROLLUP_BACKFILL_SQL)
+            yesterday = (now - timedelta(days=1)).strftime(TIMESTAMP_FORMAT)
+            c.executemany(
+                """
+                INSERT INTO gamification
+                (student_name, xp_points, streak, badges, last_activity, daily_interactions)
+                VALUES (?, ?, ?, '[]', ?, 1)
+                """,
+                ((s, rng.randrange(500), rng.randrange(10), yesterday) for s in students),
+            )
+    finally:
+        close_connections()
+        os.chdir(cwd)
+    return path
@@ -0,0 +1,157 @@
+# db_pool.py shared pool of SQLite connections
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+DB_NAME = "student.db"
+QUIZ_DB_NAME = "quiz.db"
+
+# Streamlit runs every rerun on a fresh ScriptRunner thread, so connections
+# are pooled per database file rather than tied to a thread: a caller checks
+# one out for the duration of `with connection()` / `with transaction()` and
+# returns it, keeping its PRAGMAs and statement cache warm for the next rerun.
+# Nested blocks on the same thread reuse the connection already checked out,
+# so a helper called inside a transaction sees its uncommitted writes. Only
+# the outermost transaction() commits; a nested one is a SAVEPOINT, so its
+# error undoes its own writes and the outer block decides the rest.
+# WAL lets readers and the single writer run concurrently instead of fighting
+# over the database lock.
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16000",  # ~16 MB page cache
+    "PRAGMA mmap_size=268435456",  # 256 MB memory-mapped I/O
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA foreign_keys=ON",
+)
+BUSY_TIMEOUT = 10.0
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))  # idle connections kept per database
+# Row timestamps are UTC text in the form datetime('now') produces, so range
+# predicates compare them as plain strings and can seek an index.
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+STATEMENT_CACHE_SIZE = 256
+
+_pools = {}  # absolute database path -> LifoQueue of idle connections
+_pools_lock = threading.Lock()
+_held = threading.local()  # path -> [connection, depth, transaction depth] checked out by this thread
+
+
+def _open(path):
+    conn = sqlite3.connect(
+        path,
+        timeout=BUSY_TIMEOUT,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        check_same_thread=False,  # used by one thread at a time, via the pool
+    )
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def _pool(path):
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None:
+            pool = _pools[path] = queue.LifoQueue()
+        return pool
+
+
+def _checkout(path):
+    try:
+        return _pool(path).get_nowait()
+    except queue.Empty:
+        return _open(path)
+
+
+def _checkin(path, conn):
+    if conn.in_transaction:
+        conn.rollback()
+    pool = _pool(path)
+    if pool.qsize() < POOL_SIZE:
+        pool.put(conn)
+    else:
+        conn.close()
+
+
+@contextmanager
+def connection(db_name=DB_NAME):
+    """Check a connection to `db_name` out of the pool for the duration of the block"""
+    # db_name is relative to the working directory, like sqlite3.connect
+    path = os.path.abspath(db_name)
+    held = _held.__dict__
+    entry = held.get(path)
+    if entry is not None:
+        entry[1] += 1
+        try:
+            yield entry[0]
+        finally:
+            entry[1] -= 1
+        return
+    conn = _checkout(path)
+    held[path] = [conn, 1, 0]
+    try:
+        yield conn
+    finally:
+        del held[path]
+        _checkin(path, conn)
+
+
+@contextmanager
+def transaction(db_name=DB_NAME, immediate=False):
+    """
+    Yield a cursor inside a transaction; commit on success, roll back on error.
+    immediate takes the write lock up front, for read-then-write blocks that
+    must not interleave with another writer.
+    """
+    with connection(db_name) as conn:
+        entry = _held.__dict__[os.path.abspath(db_name)]
+        if entry[2]:
+            # Nested: the outer transaction already holds any lock it needs
+            savepoint = f"sp{entry[2]}"
+            conn.execute(f"SAVEPOINT {savepoint}")
+            entry[2] += 1
+            try:
+                yield conn.cursor()
+            except BaseException:
+                conn.execute(f"ROLLBACK TO {savepoint}")
+                raise
+            finally:
+                entry[2] -= 1
+                conn.execute(f"RELEASE {savepoint}")
+            return
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        entry[2] = 1
+        try:
+            with conn:
+                yield conn.cursor()
+        finally:
+            entry[2] = 0
+
+
+def close_connections():
+    """Close every idle pooled connection, e.g. before the database files move"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        while True:
+            try:
+                pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+def utc_timestamp(when=None):
+    """`when` (default now) in the stored form; naive datetimes are taken as UTC"""
+    when = when or datetime.now(timezone.utc)
+    if when.tzinfo is not None:
+        when = when.astimezone(timezone.utc)
+    return when.strftime(TIMESTAMP_FORMAT)
+
+
+def timestamp_ago(**delta):
+    """Stored-form timestamp `delta` (timedelta kwargs) before now"""
+    return utc_timestamp(datetime.now(timezone.utc) - timedelta(**delta))
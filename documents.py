@@ -0,0 +1,86 @@
+# documents.py content-addressed storage of uploaded file text in student.db
+import hashlib
+import zlib
+
+from db_pool import connection
+
+# How app.py wraps extracted file text into the tutor question. Only the
+# student's own question is stored in interactions; the file text is stored
+# once per distinct content in `documents`.
+FILE_QUESTION_HEADER = "I have uploaded a file with the following content:\n\n"
+FILE_QUESTION_MARKER = "\n\nMy specific question about this content is:\n"
+FILE_ANALYSIS_REQUEST = (
+    "Please analyze this content and provide insights, explanations, or answer "
+    "any questions you think might be relevant to this material."
+)
+
+COMPRESSION_LEVEL = 6
+
+
+def document_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def build_file_question(document_text, question):
+    """The full question sent to the tutor for an uploaded file"""
+    if question:
+        return f"{FILE_QUESTION_HEADER}{document_text}{FILE_QUESTION_MARKER}{question}"
+    return f"{FILE_QUESTION_HEADER}{document_text}\n\n{FILE_ANALYSIS_REQUEST}"
+
+
+def split_file_question(full_question):
+    """
+    Inverse of build_file_question: (document_text, question), or None if
+    the text is not a file-based question.
+    """
+    if not full_question or not full_question.startswith(FILE_QUESTION_HEADER):
+        return None
+    body = full_question[len(FILE_QUESTION_HEADER) :]
+    if FILE_QUESTION_MARKER in body:
+        return tuple(body.rsplit(FILE_QUESTION_MARKER, 1))
+    suffix = "\n\n" + FILE_ANALYSIS_REQUEST
+    if body.endswith(suffix):
+        return body[: -len(suffix)], FILE_ANALYSIS_REQUEST
+    return None
+
+
+def store_document(c, text):
+    """Store text once (inside the caller's transaction) and return its hash"""
+    key = document_hash(text)
+    c.execute(
+        """
+        INSERT OR IGNORE INTO documents (hash, content, length, created_at)
+        VALUES (?, ?, ?, datetime('now'))
+        """,
+        (key, zlib.compress(text.encode("utf-8"), COMPRESSION_LEVEL), len(text)),
+    )
+    return key
+
+
+def get_document(key):
+    """Decompressed text of a stored document, or None"""
+    with connection() as conn:
+        row = conn.execute(
+            "SELECT content FROM documents WHERE hash = ?", (key,)
+        ).fetchone()
+    return zlib.decompress(row[0]).decode("utf-8") if row else None
+
+
+def move_file_questions_to_documents(c):
+    """Migration step: split file text out of existing interactions"""
+    rows = c.execute(
+        """
+        SELECT id, question FROM interactions
+        WHERE document_hash IS NULL AND question LIKE ? || '%'
+        """,
+        (FILE_QUESTION_HEADER,),
+    ).fetchall()
+    for inter_id, full_question in rows:
+        parts = split_file_question(full_question)
+        if parts is None:
+            continue
+        document_text, question = parts
+        c.execute(
+            "UPDATE interactions SET question = ?, document_hash = ? WHERE id = ?",
+            (question, store_document(c, document_text), inter_id),
+        )
@@ -1,21 +1,182 @@
 import streamlit as st
-import pytesseract
-from PIL import Image
-from pdf2image import convert_from_bytes
-import docx
-import pandas as pd
 import json
 import io
 import zipfile
 import tempfile
 import os
-import requests
+import gzip
+import hashlib
+import threading
+import time
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from typing import Tuple, Optional
+from lazy_imports import lazy_import
+from perf_trace import traced
+
+# OCR and document libraries load on the first upload that needs them
+pytesseract = lazy_import("pytesseract")
+Image = lazy_import("PIL.Image")
+pdf2image = lazy_import("pdf2image")
+pypdf = lazy_import("pypdf")
+docx = lazy_import("docx")
+pd = lazy_import("pandas")
+
+OCR_CACHE_DIR = os.getenv("OCR_CACHE_DIR", "ocr_cache")
+OCR_CACHE_MEMORY_ITEMS = 64
+# Compressed bytes kept on disk; least recently read or written files go first
+OCR_CACHE_MAX_BYTES = int(os.getenv("OCR_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Multi-page PDFs are OCR'd in a process pool: each task rasterizes and reads
+# OCR_PAGE_BATCH pages, one page image in memory at a time.
+OCR_MAX_WORKERS = int(os.getenv("OCR_MAX_WORKERS", str(min(4, os.cpu_count() or 1))))
+OCR_PAGE_BATCH = int(os.getenv("OCR_PAGE_BATCH", "2"))
+
+# A page's embedded text layer is used instead of OCR when it has at least
+# PDF_TEXT_MIN_CHARS visible characters, of which PDF_TEXT_MIN_QUALITY are
+# letters, digits or common punctuation (broken font encodings produce junk).
+PDF_TEXT_MIN_CHARS = 40
+PDF_TEXT_MIN_QUALITY = 0.6
+
+_ocr_pool = None
+_ocr_pool_lock = threading.Lock()
+
+def get_ocr_pool() -> ProcessPoolExecutor:
+    """Shared OCR worker pool, created on first use"""
+    global _ocr_pool
+    with _ocr_pool_lock:
+        if _ocr_pool is None:
+            # spawn: forking a multi-threaded Streamlit server is not safe
+            _ocr_pool = ProcessPoolExecutor(
+                max_workers=OCR_MAX_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _ocr_pool
+
+def text_layer_is_usable(text: str) -> bool:
+    visible = "".join(text.split())
+    if len(visible) < PDF_TEXT_MIN_CHARS:
+        return False
+    readable = sum(ch.isalnum() or ch in ".,;:!?()[]+-=*/%'\"" for ch in visible)
+    return readable / len(visible) >= PDF_TEXT_MIN_QUALITY
+
+def page_batches(pages: list, batch_size: int) -> list:
+    """Group sorted page numbers into contiguous (first, last) runs of at most batch_size"""
+    batches = []
+    for page in pages:
+        if batches and page == batches[-1][1] + 1 and page - batches[-1][0] < batch_size:
+            batches[-1] = (batches[-1][0], page)
+        else:
+            batches.append((page, page))
+    return batches
+
+def ocr_pdf_pages(pdf_path: str, first_page: int, last_page: int) -> list:
+    """
+    Rasterize and OCR pages first_page..last_page (1-based, inclusive).
+    Returns [(page_number, text, seconds, error)]; runs in a worker process.
+    """
+    results = []
+    for page_number in range(first_page, last_page + 1):
+        start = time.perf_counter()
+        text, error = "", None
+        try:
+            images = pdf2image.convert_from_path(pdf_path, first_page=page_number, last_page=page_number)
+            if images:
+                text = pytesseract.image_to_string(images[0], lang='eng')
+        except Exception as e:
+            error = str(e)
+        results.append((page_number, text, time.perf_counter() - start, error))
+    return results
+
+class ExtractionCache:
+    """
+    Two-tier cache of extracted text keyed by content hash: an in-memory LRU
+    for reruns in the same process, backed by gzip files on disk that survive
+    restarts. A file's mtime is its last access; once the disk tier grows
+    past max_bytes the least recently used files are deleted.
+    """
+
+    def __init__(self, cache_dir: str = OCR_CACHE_DIR, max_items: int = OCR_CACHE_MEMORY_ITEMS,
+                 max_bytes: int = OCR_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.txt.gz")
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        path = self._path(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                text = f.read()
+            os.utime(path)  # atime is unreliable (noatime, relatime mounts)
+        except (OSError, EOFError):
+            return None
+        self._remember(key, text)
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        self._remember(key, text)
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so a concurrent reader never sees a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, "wb") as raw, gzip.open(raw, "wt", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+            self._prune()
+        except OSError:
+            pass  # the disk tier is best effort; the memory tier still works
+
+    def _prune(self) -> None:
+        """Delete the least recently used files until the disk tier fits max_bytes"""
+        files, total = [], 0
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue  # removed by another process meanwhile
+                files.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        files.sort()
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def _remember(self, key: str, text: str) -> None:
+        with self._lock:
+            self._memory[key] = text
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_items:
+                self._memory.popitem(last=False)
+
+extraction_cache = ExtractionCache()
 
 class FileProcessor:
     """Handle various file types and extract readable content"""
-    
-    def __init__(self):
+
+    # Bump whenever extraction output changes so stale cache entries are ignored
+    PROCESSOR_VERSION = "2"
+
+    def __init__(self, cache: Optional[ExtractionCache] = None):
+        self.cache = cache if cache is not None else extraction_cache
+        self.last_page_timings = []  # [(page_number, seconds, method)] from the last PDF
         self.supported_types = [
             "png", "jpg", "jpeg", "gif", "bmp", "tiff",  # Images
             "pdf",  # PDF
@@ -26,6 +187,7 @@ class FileProcessor:
             "zip"  # ZIP files (limited support)
         ]
     
+    @traced
     def extract_text_from_image(self, image_file) -> str:
         """Extract text from image using OCR"""
         try:
@@ -38,24 +200,75 @@ class FileProcessor:
         except Exception as e:
             raise Exception(f"Error processing image: {str(e)}")
     
+    def read_text_layer(self, pdf_bytes: bytes) -> list:
+        """
+        Read each page's embedded text layer
+        Returns: [(text, seconds)] per page, or [] if the PDF cannot be parsed
+        """
+        try:
+            reader = pypdf.PdfReader(io.BytesIO(pdf_bytes))
+            pages = []
+            for page in reader.pages:
+                start = time.perf_counter()
+                try:
+                    text = page.extract_text() or ""
+                except Exception:
+                    text = ""
+                pages.append((text, time.perf_counter() - start))
+            return pages
+        except Exception:
+            return []
+
+    @traced
     def extract_text_from_pdf(self, pdf_file) -> str:
-        """Extract text from PDF using OCR"""
+        """
+        Extract text from PDF: use the embedded text layer where it is good
+        enough and OCR only the remaining pages, in parallel batches
+        """
         try:
-            # Convert PDF pages to images
-            pages = convert_from_bytes(pdf_file.read())
-            full_text = ""
-            
-            for i, page in enumerate(pages):
+            pdf_bytes = pdf_file.read()
+            text_layer = self.read_text_layer(pdf_bytes)
+            page_count = len(text_layer) or pdf2image.pdfinfo_from_bytes(pdf_bytes)["Pages"]
+
+            page_results = {}  # page -> (text, seconds, error, method)
+            for page, (text, seconds) in enumerate(text_layer, start=1):
+                if text_layer_is_usable(text):
+                    page_results[page] = (text, seconds, None, "text layer")
+
+            ocr_pages = [page for page in range(1, page_count + 1) if page not in page_results]
+            batches = page_batches(ocr_pages, OCR_PAGE_BATCH)
+            if batches:
+                # Workers read the PDF from disk instead of each receiving a copy
+                with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+                    tmp.write(pdf_bytes)
                 try:
-                    page_text = pytesseract.image_to_string(page, lang='eng')
-                    full_text += f"\n--- Page {i+1} ---\n{page_text}\n"
-                except Exception as e:
-                    full_text += f"\n--- Page {i+1} (Error: {str(e)}) ---\n"
-            
+                    if OCR_MAX_WORKERS > 1 and len(batches) > 1:
+                        pool = get_ocr_pool()
+                        futures = [pool.submit(ocr_pdf_pages, tmp.name, first, last) for first, last in batches]
+                        ocr_results = [r for future in futures for r in future.result()]
+                    else:
+                        ocr_results = [r for first, last in batches for r in ocr_pdf_pages(tmp.name, first, last)]
+                finally:
+                    os.unlink(tmp.name)
+                for page, text, seconds, error in ocr_results:
+                    page_results[page] = (text, seconds, error, "OCR")
+
+            self.last_page_timings = [
+                (page, page_results[page][1], page_results[page][3]) for page in sorted(page_results)
+            ]
+            full_text = ""
+            for page in sorted(page_results):
+                page_text, _, error, _ = page_results[page]
+                if error:
+                    full_text += f"\n--- Page {page} (Error: {error}) ---\n"
+                else:
+                    full_text += f"\n--- Page {page} ---\n{page_text}\n"
+
             return full_text.strip()
         except Exception as e:
             raise Exception(f"Error processing PDF: {str(e)}")
     
+    @traced
     def extract_text_from_docx(self, docx_file) -> str:
         """Extract text from Word document"""
         try:
@@ -170,9 +383,15 @@ class FileProcessor:
         except Exception as e:
             raise Exception(f"Error processing JSON file: {str(e)}")
     
+    def cache_key(self, data: bytes, file_type: str) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        return hashlib.sha256(f"{digest}:{file_type}:{self.PROCESSOR_VERSION}".encode()).hexdigest()
+
+    @traced
     def process_file(self, uploaded_file) -> Tuple[str, str]:
         """
-        Process uploaded file and extract text content
+        Process uploaded file and extract text content, reusing earlier results
+        for identical file bytes
         Returns: (extracted_text, file_info)
         """
         if not uploaded_file:
@@ -188,7 +407,13 @@ class FileProcessor:
         try:
             # Reset file pointer
             uploaded_file.seek(0)
-            
+            key = self.cache_key(uploaded_file.read(), file_type)
+            uploaded_file.seek(0)
+
+            cached_text = self.cache.get(key)
+            if cached_text:
+                return cached_text, file_info
+
             if file_type in ['png', 'jpg', 'jpeg', 'gif', 'bmp', 'tiff']:
                 extracted_text = self.extract_text_from_image(uploaded_file)
                 
@@ -215,7 +440,8 @@ class FileProcessor:
             
             if not extracted_text or extracted_text.isspace():
                 raise Exception("No readable content found in the file")
-            
+
+            self.cache.put(key, extracted_text)
             return extracted_text, file_info
             
         except Exception as e:
@@ -269,6 +495,14 @@ def render_file_upload_section(subject: str) -> Tuple[str, str, str]:
         
         if extracted_text:
             st.success("✅ File processed successfully!")
+
+            if processor.last_page_timings:
+                total = sum(seconds for _, seconds, _ in processor.last_page_timings)
+                with st.expander(f"⏱️ Extraction time: {total:.1f}s across {len(processor.last_page_timings)} pages", expanded=False):
+                    st.dataframe(
+                        pd.DataFrame(processor.last_page_timings, columns=["Page", "Seconds", "Method"]),
+                        hide_index=True,
+                    )
             
             # Show file info in a compact way
             st.markdown(f"**📁 File:** {uploaded_file.name} ({uploaded_file.size:,} bytes)")
@@ -0,0 +1,117 @@
+# gamification_service.py cached XP/streak/badges with batched writes
+import atexit
+import threading
+import time
+from datetime import datetime, timedelta
+
+import student_db
+
+FLUSH_BATCH_SIZE = 20  # pending events that force a flush
+FLUSH_INTERVAL = 30.0  # seconds a pending event may wait before being written
+
+
+class GamificationService:
+    """
+    Keeps each student's gamification row in memory and only records an event
+    when it actually changes something: XP gained, a new badge, or the first
+    activity on a new day. Events are buffered and written together with
+    student_db.update_gamification_many, so read-only reruns never hit disk.
+
+    The cache is per process; all in-process writers must go through this
+    service for it to stay in sync with the database.
+    """
+
+    def __init__(self, batch_size=FLUSH_BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._rows = {}
+        self._pending = []
+        self._oldest_pending = None
+        self._lock = threading.RLock()
+
+    def _load(self, student_name):
+        row = self._rows.get(student_name)
+        if row is None:
+            row = self._rows[student_name] = student_db.get_gamification(student_name)
+        return row
+
+    def get(self, student_name):
+        with self._lock:
+            row = dict(self._load(student_name))
+            row["badges"] = list(row["badges"])
+        self._maybe_flush()
+        return row
+
+    def update(self, student_name, xp=0, badge=None):
+        """Same rules as student_db.update_gamification, applied to the cached row"""
+        now = datetime.now()
+        today = now.date()
+        with self._lock:
+            row = self._load(student_name)
+            last_day = row["last_activity"].date() if row["last_activity"] else None
+            new_badge = bool(badge) and badge not in row["badges"]
+            if not xp and not new_badge and last_day == today:
+                return False
+
+            row["xp"] = (row["xp"] or 0) + xp
+            if last_day == today:
+                row["daily_interactions"] = (row["daily_interactions"] or 0) + 1
+            else:
+                if last_day == today - timedelta(days=1):
+                    row["streak"] = (row["streak"] or 0) + 1
+                else:
+                    row["streak"] = 1
+                row["daily_interactions"] = 1
+            if new_badge:
+                row["badges"].append(badge)
+            row["last_activity"] = now
+
+            self._pending.append(
+                student_db.gamification_event(student_name, xp, badge, now)
+            )
+            if self._oldest_pending is None:
+                self._oldest_pending = time.monotonic()
+        self._maybe_flush()
+        return True
+
+    def _maybe_flush(self):
+        with self._lock:
+            due = self._pending and (
+                len(self._pending) >= self.batch_size
+                or time.monotonic() - self._oldest_pending >= self.flush_interval
+            )
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write all buffered events in one transaction"""
+        with self._lock:
+            events, self._pending = self._pending, []
+            self._oldest_pending = None
+            if not events:
+                return 0
+            try:
+                student_db.update_gamification_many(events)
+            except Exception:
+                # Keep the events so the next flush retries them
+                self._pending = events + self._pending
+                self._oldest_pending = time.monotonic()
+                raise
+        return len(events)
+
+
+# --- Singleton instance ---
+gamification_service = GamificationService()
+atexit.register(gamification_service.flush)
+
+
+def get_gamification(student_name):
+    return gamification_service.get(student_name)
+
+
+def update_gamification(student_name, xp=0, badge=None):
+    return gamification_service.update(student_name, xp, badge)
+
+
+def flush_gamification():
+    return gamification_service.flush()
@@ -0,0 +1,66 @@
+# json_stream.py incremental extraction of JSON objects from streamed LLM output
+import json
+import re
+
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+class JSONObjectStream:
+    """
+    Pulls complete top-level JSON objects out of text that arrives in chunks.
+
+    Only brace depth and string state are tracked, so whatever surrounds the
+    objects (markdown fences, prose, the brackets of the outer array) is
+    ignored. Each object is parsed on its own: a malformed one is counted in
+    `errors` and skipped without affecting the others.
+    """
+
+    def __init__(self):
+        self.errors = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._partial = []  # text of the object still being received
+
+    def feed(self, chunk):
+        """Consume a chunk and return the objects completed by it"""
+        objects = []
+        start = 0
+        for i, ch in enumerate(chunk):
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                # quotes outside an object are prose, not JSON strings
+                self._in_string = self._depth > 0
+            elif ch == "{":
+                if self._depth == 0:
+                    start = i
+                    self._partial = []
+                self._depth += 1
+            elif ch == "}" and self._depth:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._partial.append(chunk[start : i + 1])
+                    obj = self._parse("".join(self._partial))
+                    self._partial = []
+                    if obj is not None:
+                        objects.append(obj)
+        if self._depth:
+            self._partial.append(chunk[start:])
+        return objects
+
+    def _parse(self, text):
+        for candidate in (text, _TRAILING_COMMA.sub(r"\1", text)):
+            try:
+                obj = json.loads(candidate, strict=False)
+            except ValueError:
+                continue
+            if isinstance(obj, dict):
+                return obj
+        self.errors += 1
+        return None
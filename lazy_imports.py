@@ -0,0 +1,51 @@
+# lazy_imports.py deferred imports of heavy libraries
+import importlib
+import time
+import types
+
+from perf_trace import span
+
+# OCR, document, spreadsheet and plotting libraries add seconds to a cold
+# start but are only needed once a student uploads a file or opens a chart.
+# Modules bind them with `pd = lazy_import("pandas")` at the top and use
+# them as usual; the real import happens on first attribute access.
+_timings = {}  # module name -> seconds its first use spent importing it
+
+
+class LazyModule(types.ModuleType):
+    """Placeholder that imports the named module when first used"""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__["_lazy_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            start = time.perf_counter()
+            # importlib serialises concurrent imports of the same module
+            with span(f"import {self.__name__}"):
+                module = importlib.import_module(self.__name__)
+            _timings.setdefault(self.__name__, time.perf_counter() - start)
+            self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_lazy_module"] is not None else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy_import(name):
+    """A LazyModule for `name` (e.g. "pandas", "PIL.Image")"""
+    return LazyModule(name)
+
+
+def import_timings():
+    """{module: seconds} for every lazy module imported so far"""
+    return dict(_timings)
@@ -0,0 +1,70 @@
+# llm_client.py process-wide OpenAI client with pooled keep-alive connections
+import os
+import threading
+import openai
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# All settings can be overridden from the environment, e.g. point
+# OPENAI_BASE_URL at a local OpenAI-compatible mock server.
+LLM_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+LLM_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "60"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "5"))
+# The SDK retries connection errors, 408/409/429 and 5xx with exponential
+# backoff and jitter, honouring Retry-After headers.
+LLM_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+LLM_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+LLM_MAX_KEEPALIVE = int(os.getenv("OPENAI_MAX_KEEPALIVE", "10"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "60"))
+
+# The SDK's HTTP backend differs between releases (httpx / httpx2), so take
+# the Limits class from the SDK rather than importing the backend directly.
+_Limits = type(openai.DEFAULT_CONNECTION_LIMITS)
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def _build_client(api_key, base_url):
+    timeout = openai.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT)
+    http_client = openai.DefaultHttpxClient(
+        limits=_Limits(
+            max_connections=LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_MAX_KEEPALIVE,
+            keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+        ),
+        timeout=timeout,
+    )
+    return openai.OpenAI(
+        api_key=api_key,
+        base_url=base_url,
+        timeout=timeout,
+        max_retries=LLM_MAX_RETRIES,
+        http_client=http_client,
+    )
+
+
+def get_openai_client(api_key=None, base_url=None):
+    """
+    Return the shared client for (api_key, base_url), creating it on first use.
+    The client is thread-safe, so every request reuses its warm connections.
+    """
+    api_key = api_key or os.getenv("OPENAI_API_KEY")
+    base_url = base_url or LLM_BASE_URL
+    key = (api_key, base_url)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = _build_client(api_key, base_url)
+    return client
+
+
+def close_clients():
+    """Close every shared client and its connection pool"""
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
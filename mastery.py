@@ -0,0 +1,190 @@
+# mastery.py incremental Bayesian knowledge tracing per (student, subject, topic)
+from datetime import datetime
+
+from db_pool import connection, transaction
+
+# Bayesian knowledge tracing: mastery_score is P(topic is known). Each answer
+# updates it with Bayes' rule (slip = knows it but answers wrong, guess =
+# doesn't know it but answers right), then adds the chance of learning from
+# the attempt. Tutor feedback is weaker evidence than a quiz answer.
+BKT_P_INIT = 0.3
+BKT_P_LEARN = 0.15
+BKT_EVIDENCE = {
+    "quiz": {"slip": 0.1, "guess": 1 / 3},  # 3-option multiple choice
+    "feedback": {"slip": 0.2, "guess": 0.5},
+}
+DEFAULT_TOPIC = "general"
+
+
+def bkt_update(p_known, correct, source="quiz"):
+    """Posterior P(known) after one observed answer"""
+    slip = BKT_EVIDENCE[source]["slip"]
+    guess = BKT_EVIDENCE[source]["guess"]
+    if correct:
+        evidence = p_known * (1 - slip)
+        posterior = evidence / (evidence + (1 - p_known) * guess)
+    else:
+        evidence = p_known * slip
+        posterior = evidence / (evidence + (1 - p_known) * (1 - guess))
+    return posterior + (1 - posterior) * BKT_P_LEARN
+
+
+def difficulty_for(p_known):
+    """Recommended difficulty 1-10 for a mastery probability"""
+    return 1 + round(p_known * 9)
+
+
+# ----------------------------
+# Storage
+# ----------------------------
+# student_progress holds one row per topic; subject_mastery keeps the running
+# per-subject sums so analysis reads one row. All helpers take the cursor of
+# an open transaction and write before they read, so the write lock is held
+# and concurrent updates cannot be lost.
+
+
+def _ensure_topic(c, student_name, subject, topic, learning_style=None):
+    now = datetime.now()
+    c.execute(
+        """
+        INSERT OR IGNORE INTO subject_mastery
+        (student_name, subject, topic_count, mastery_sum, total_sessions, learning_style, updated_at)
+        VALUES (?, ?, 0, 0, 0, ?, ?)
+        """,
+        (student_name, subject, learning_style, now),
+    )
+    c.execute(
+        """
+        INSERT OR IGNORE INTO student_progress
+        (student_name, subject, topic, difficulty_level, mastery_score, struggle_areas,
+         learning_style, last_session, total_sessions, attempts, correct_count, success_rate)
+        VALUES (?, ?, ?, ?, ?, '', ?, ?, 0, 0, 0, 0)
+        """,
+        (student_name, subject, topic, difficulty_for(BKT_P_INIT), BKT_P_INIT, learning_style, now),
+    )
+    if c.rowcount == 1:
+        c.execute(
+            """
+            UPDATE subject_mastery
+            SET topic_count = topic_count + 1, mastery_sum = mastery_sum + ?
+            WHERE student_name = ? AND subject = ?
+            """,
+            (BKT_P_INIT, student_name, subject),
+        )
+
+
+def observe(c, student_name, subject, topic, correct, source="quiz"):
+    """Apply one answer to a topic's mastery; returns the new P(known)"""
+    _ensure_topic(c, student_name, subject, topic)
+    old = c.execute(
+        """
+        SELECT mastery_score FROM student_progress
+        WHERE student_name = ? AND subject = ? AND topic = ?
+        """,
+        (student_name, subject, topic),
+    ).fetchone()[0]
+    old = old or 0.0
+    new = bkt_update(old if old > 0 else BKT_P_INIT, correct, source)
+    now = datetime.now()
+    c.execute(
+        """
+        UPDATE student_progress
+        SET mastery_score = ?,
+            difficulty_level = ?,
+            attempts = attempts + 1,
+            correct_count = correct_count + ?,
+            success_rate = (correct_count + ?) * 1.0 / (attempts + 1),
+            last_session = ?
+        WHERE student_name = ? AND subject = ? AND topic = ?
+        """,
+        (new, difficulty_for(new), int(correct), int(correct), now, student_name, subject, topic),
+    )
+    c.execute(
+        """
+        UPDATE subject_mastery
+        SET mastery_sum = mastery_sum + ?, updated_at = ?
+        WHERE student_name = ? AND subject = ?
+        """,
+        (new - old, now, student_name, subject),
+    )
+    return new
+
+
+def record_session(c, student_name, subject, topic, learning_style):
+    """Count a tutor session on a topic without changing its mastery"""
+    _ensure_topic(c, student_name, subject, topic, learning_style)
+    now = datetime.now()
+    c.execute(
+        """
+        UPDATE student_progress
+        SET total_sessions = total_sessions + 1, learning_style = ?, last_session = ?
+        WHERE student_name = ? AND subject = ? AND topic = ?
+        """,
+        (learning_style, now, student_name, subject, topic),
+    )
+    c.execute(
+        """
+        UPDATE subject_mastery
+        SET total_sessions = total_sessions + 1, learning_style = ?, updated_at = ?
+        WHERE student_name = ? AND subject = ?
+        """,
+        (learning_style, now, student_name, subject),
+    )
+
+
+def record_answers(student_name, subject, answers, source="quiz"):
+    """Apply [(topic, correct)] in one transaction; returns {topic: P(known)}"""
+    mastery = {}
+    with transaction() as c:
+        for topic, correct in answers:
+            mastery[topic] = observe(c, student_name, subject, topic or DEFAULT_TOPIC, correct, source)
+    return mastery
+
+
+def record_tutor_session(student_name, subject, topic, learning_style):
+    with transaction() as c:
+        record_session(c, student_name, subject, topic or DEFAULT_TOPIC, learning_style)
+
+
+def get_subject_mastery(student_name, subject):
+    """Precomputed per-subject state, or None for a student new to the subject"""
+    with connection() as conn:
+        row = conn.execute(
+            """
+            SELECT topic_count, mastery_sum, total_sessions, learning_style
+            FROM subject_mastery
+            WHERE student_name = ? AND subject = ?
+            """,
+            (student_name, subject),
+        ).fetchone()
+    if row is None or not row[0]:
+        return None
+    topic_count, mastery_sum, total_sessions, learning_style = row
+    average = mastery_sum / topic_count
+    return {
+        "topic_count": topic_count,
+        "average_mastery": average,
+        "total_sessions": total_sessions,
+        "learning_style": learning_style or "visual",
+        "recommended_difficulty": difficulty_for(average),
+    }
+
+
+def get_topic_mastery(student_name, subject, topic):
+    with connection() as conn:
+        row = conn.execute(
+            """
+            SELECT mastery_score, difficulty_level, attempts, success_rate
+            FROM student_progress
+            WHERE student_name = ? AND subject = ? AND topic = ?
+            """,
+            (student_name, subject, topic),
+        ).fetchone()
+    if row is None:
+        return None
+    return {
+        "mastery": row[0],
+        "difficulty_level": row[1],
+        "attempts": row[2],
+        "success_rate": row[3],
+    }
@@ -0,0 +1,441 @@
+# migrations.py versioned schema changes for student.db and quiz.db
+import logging
+
+from db_pool import DB_NAME, connection
+from documents import move_file_questions_to_documents
+
+logger = logging.getLogger(__name__)
+
+# Each migration is (version, description, steps). A step is either a SQL
+# string or a callable taking a cursor, for changes that need Python (backfills).
+# The applied version is stored in PRAGMA user_version, so append new
+# migrations to the end of the list and never edit one that has shipped.
+ROLLUP_BACKFILL_SQL = """
+    INSERT OR REPLACE INTO interaction_rollup
+    (student, grade, subject, day, questions, helpful, not_helpful, neutral)
+    SELECT IFNULL(student, ''), IFNULL(grade, ''), IFNULL(subject, ''),
+           IFNULL(date(created_at), ''), COUNT(*),
+           SUM(feedback = 1), SUM(feedback = -1),
+           SUM(feedback IS NULL OR feedback NOT IN (1, -1))
+    FROM interactions
+    GROUP BY 1, 2, 3, 4
+"""
+
+
+def _normalize_interaction_timestamps(c):
+    # created_at is compared as plain text, so every row must use the
+    # 'YYYY-MM-DD HH:MM:SS' UTC form of datetime('now'); rows written with an
+    # ISO 'T', fractional seconds or a UTC offset are rewritten in place
+    c.execute(
+        """
+        UPDATE interactions SET created_at = datetime(created_at)
+        WHERE datetime(created_at) IS NOT NULL
+          AND created_at IS NOT datetime(created_at)
+        """
+    )
+    if c.rowcount:
+        # an offset can move a row to another UTC day
+        c.execute("DELETE FROM interaction_rollup")
+        c.execute(ROLLUP_BACKFILL_SQL)
+
+
+# The tutor used to write every session to one placeholder topic row. Its
+# sessions and learning style still count, but it is not a topic: it never
+# gets observations, so its mastery must not enter the subject average.
+LEGACY_PLACEHOLDER_TOPIC = "current_topic"
+
+SUBJECT_MASTERY_BACKFILL_SQL = f"""
+    INSERT OR IGNORE INTO subject_mastery
+    (student_name, subject, topic_count, mastery_sum, total_sessions, learning_style, updated_at)
+    SELECT student_name, subject,
+           SUM(topic IS NOT '{LEGACY_PLACEHOLDER_TOPIC}'),
+           SUM(CASE WHEN topic IS '{LEGACY_PLACEHOLDER_TOPIC}' THEN 0 ELSE COALESCE(mastery_score, 0) END),
+           SUM(COALESCE(total_sessions, 0)), learning_style, MAX(last_session)
+    FROM student_progress
+    WHERE student_name IS NOT NULL AND subject IS NOT NULL
+    GROUP BY student_name, subject
+"""
+
+
+def _drop_placeholder_topics(c):
+    # Databases backfilled before the placeholder was skipped counted it as a
+    # topic: recount topic_count/mastery_sum without it, then drop the row
+    # (its sessions are already in subject_mastery.total_sessions)
+    c.execute(
+        """
+        UPDATE subject_mastery
+        SET (topic_count, mastery_sum) = (
+            SELECT COUNT(*), COALESCE(SUM(COALESCE(p.mastery_score, 0)), 0)
+            FROM student_progress p
+            WHERE p.student_name = subject_mastery.student_name
+              AND p.subject = subject_mastery.subject
+              AND p.topic IS NOT ?
+        )
+        WHERE EXISTS (
+            SELECT 1 FROM student_progress p
+            WHERE p.student_name = subject_mastery.student_name
+              AND p.subject = subject_mastery.subject AND p.topic = ?
+        )
+        """,
+        (LEGACY_PLACEHOLDER_TOPIC, LEGACY_PLACEHOLDER_TOPIC),
+    )
+    c.execute("DELETE FROM student_progress WHERE topic = ?", (LEGACY_PLACEHOLDER_TOPIC,))
+
+
+STUDENT_DB_MIGRATIONS = [
+    (
+        1,
+        "indexes for hot interaction/progress/gamification lookups",
+        [
+            # get_recent_interactions (ORDER BY created_at) and the graded
+            # weekly summary; subject/feedback make the latter index-only
+            """
+            CREATE INDEX IF NOT EXISTS idx_interactions_student_grade_created
+            ON interactions (student, grade, created_at, subject, feedback)
+            """,
+            # weekly summary without a grade filter
+            """
+            CREATE INDEX IF NOT EXISTS idx_interactions_student_created
+            ON interactions (student, created_at, subject, feedback)
+            """,
+            # teacher dashboard GROUP BY subject/feedback, weak topics,
+            # DISTINCT student list
+            """
+            CREATE INDEX IF NOT EXISTS idx_interactions_student_grade_subject
+            ON interactions (student, grade, subject, feedback)
+            """,
+            # Older code could insert duplicates; keep the row it was reading
+            # (the lowest id) before adding the unique keys.
+            """
+            DELETE FROM gamification
+            WHERE student_name IS NOT NULL
+              AND id NOT IN (
+                SELECT MIN(id) FROM gamification GROUP BY student_name
+              )
+            """,
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS ux_gamification_student
+            ON gamification (student_name)
+            """,
+            """
+            DELETE FROM student_progress
+            WHERE id NOT IN (
+                SELECT MIN(id) FROM student_progress
+                GROUP BY student_name, subject, topic
+            )
+            """,
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS ux_student_progress_topic
+            ON student_progress (student_name, subject, topic)
+            """,
+        ],
+    ),
+    (
+        2,
+        "answer_cache for tutor responses",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS answer_cache (
+                cache_key TEXT PRIMARY KEY,
+                subject TEXT,
+                grade TEXT,
+                approach TEXT,
+                question_norm TEXT,
+                answer TEXT,
+                created_at REAL,
+                last_used_at REAL,
+                hit_count INTEGER DEFAULT 0
+            )
+            """,
+            # near-duplicate candidates come from the same bucket, newest first
+            """
+            CREATE INDEX IF NOT EXISTS idx_answer_cache_bucket
+            ON answer_cache (subject, grade, approach, last_used_at)
+            """,
+            # LRU eviction
+            """
+            CREATE INDEX IF NOT EXISTS idx_answer_cache_last_used
+            ON answer_cache (last_used_at)
+            """,
+        ],
+    ),
+    (
+        3,
+        "mastery tracking: answer counts per topic and subject_mastery",
+        [
+            "ALTER TABLE student_progress ADD COLUMN attempts INTEGER DEFAULT 0",
+            "ALTER TABLE student_progress ADD COLUMN correct_count INTEGER DEFAULT 0",
+            # Running sums over a student's topic rows, kept in step by
+            # mastery.py so the tutor reads one row per question
+            """
+            CREATE TABLE IF NOT EXISTS subject_mastery (
+                student_name TEXT NOT NULL,
+                subject TEXT NOT NULL,
+                topic_count INTEGER DEFAULT 0,
+                mastery_sum REAL DEFAULT 0,
+                total_sessions INTEGER DEFAULT 0,
+                learning_style TEXT,
+                updated_at TIMESTAMP,
+                PRIMARY KEY (student_name, subject)
+            )
+            """,
+            # learning_style comes from the row with the latest session
+            # (SQLite bare-column semantics with MAX)
+            SUBJECT_MASTERY_BACKFILL_SQL,
+        ],
+    ),
+    (
+        4,
+        "interaction_rollup for the teacher dashboard",
+        [
+            # Kept in step by log_interaction/set_feedback; key columns are
+            # never NULL so the upserts always find their row
+            """
+            CREATE TABLE IF NOT EXISTS interaction_rollup (
+                student TEXT NOT NULL,
+                grade TEXT NOT NULL,
+                subject TEXT NOT NULL,
+                day TEXT NOT NULL,
+                questions INTEGER NOT NULL DEFAULT 0,
+                helpful INTEGER NOT NULL DEFAULT 0,
+                not_helpful INTEGER NOT NULL DEFAULT 0,
+                neutral INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (student, grade, subject, day)
+            ) WITHOUT ROWID
+            """,
+            ROLLUP_BACKFILL_SQL,
+        ],
+    ),
+    (
+        5,
+        "index for keyset-paginated interaction history",
+        [
+            # (student, grade, created_at) + the implicit trailing rowid
+            # serves ORDER BY created_at DESC, id DESC and the
+            # (created_at, id) < cursor seek without a sort
+            """
+            CREATE INDEX IF NOT EXISTS idx_interactions_history
+            ON interactions (student, grade, created_at)
+            """,
+        ],
+    ),
+    (
+        6,
+        "content-addressed documents for uploaded file text",
+        [
+            # hash = sha256 of the text, content = zlib-compressed UTF-8
+            """
+            CREATE TABLE IF NOT EXISTS documents (
+                hash TEXT PRIMARY KEY,
+                content BLOB NOT NULL,
+                length INTEGER,
+                created_at TEXT
+            )
+            """,
+            "ALTER TABLE interactions ADD COLUMN document_hash TEXT REFERENCES documents (hash)",
+            move_file_questions_to_documents,
+        ],
+    ),
+    (
+        7,
+        "normalized interaction timestamps for range scans",
+        [
+            _normalize_interaction_timestamps,
+            # all-student weekly/daily reports: created_at range first,
+            # subject/feedback make the scan index-only
+            """
+            CREATE INDEX IF NOT EXISTS idx_interactions_created
+            ON interactions (created_at, student, subject, feedback)
+            """,
+        ],
+    ),
+    (
+        8,
+        "drop the legacy placeholder topic from mastery averages",
+        [_drop_placeholder_topics],
+    ),
+]
+
+def _add_attempt_id_column(c):
+    # attempt_id was added to quiz_attempts by hand on some copies of quiz.db
+    columns = [row[1] for row in c.execute("PRAGMA table_info(quiz_attempts)")]
+    if "attempt_id" not in columns:
+        c.execute("ALTER TABLE quiz_attempts ADD COLUMN attempt_id TEXT")
+
+
+QUIZ_ATTEMPT_COLUMNS = (
+    "id, student_name, grade, subject, qid, question, selected_answer, "
+    "correct_answer, is_correct, score, attempt_date, attempt_id"
+)
+
+
+def _archive_legacy_attempts(c):
+    # Before the question bank, qid held the LLM's per-quiz ids (1, 2, 3 ...),
+    # which collide with question_bank ids. Those rows move to
+    # quiz_attempts_legacy so per-question stats only see bank questions,
+    # and attempts without an attempt_id get one so the attempt limit still
+    # counts them: a run of consecutive rows for one student, subject and day
+    # with no repeated qid is one submitted quiz.
+    rows = c.execute(
+        """
+        SELECT id, student_name, subject, attempt_date, qid FROM quiz_attempts
+        WHERE attempt_id IS NULL ORDER BY id
+        """
+    ).fetchall()
+    updates, run, seen, previous_id = [], None, set(), None
+    for row_id, student, subject, day, qid in rows:
+        if (student, subject, day) != run or qid in seen or row_id != previous_id + 1:
+            run, seen, attempt_id = (student, subject, day), set(), f"legacy-{row_id}"
+        seen.add(qid)
+        previous_id = row_id
+        updates.append((attempt_id, row_id))
+    c.executemany("UPDATE quiz_attempts SET attempt_id = ? WHERE id = ?", updates)
+
+    # A row belongs to the bank only if its qid names the same question
+    legacy = """
+        NOT EXISTS (
+            SELECT 1 FROM question_bank b
+            WHERE b.id = quiz_attempts.qid AND b.question = quiz_attempts.question
+        )
+    """
+    c.execute(
+        f"""
+        INSERT INTO quiz_attempts_legacy ({QUIZ_ATTEMPT_COLUMNS})
+        SELECT {QUIZ_ATTEMPT_COLUMNS} FROM quiz_attempts WHERE {legacy}
+        """
+    )
+    c.execute(f"DELETE FROM quiz_attempts WHERE {legacy}")
+
+
+QUIZ_DB_MIGRATIONS = [
+    (
+        1,
+        "question_bank of pre-generated quiz questions",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS question_bank (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                grade TEXT NOT NULL,
+                subject TEXT NOT NULL,
+                question TEXT NOT NULL,
+                question_norm TEXT NOT NULL,
+                options TEXT NOT NULL,
+                correct TEXT NOT NULL,
+                rand REAL NOT NULL,
+                served_count INTEGER NOT NULL DEFAULT 0,
+                retired INTEGER NOT NULL DEFAULT 0,
+                created_at REAL
+            )
+            """,
+            # dedup: the same question is stored once per grade/subject,
+            # including retired ones so they are not generated again
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS ux_question_bank_norm
+            ON question_bank (grade, subject, question_norm)
+            """,
+            # random pick (rand >= ?) and stock counts per grade/subject
+            """
+            CREATE INDEX IF NOT EXISTS idx_question_bank_pick
+            ON question_bank (grade, subject, retired, rand)
+            """,
+        ],
+    ),
+    (
+        2,
+        "quiz_attempts indexes for attempt limits and question stats",
+        [
+            # Older databases already have this table; new ones get the same shape
+            """
+            CREATE TABLE IF NOT EXISTS quiz_attempts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                student_name TEXT,
+                grade TEXT,
+                subject TEXT,
+                qid INTEGER,
+                question TEXT,
+                selected_answer TEXT,
+                correct_answer TEXT,
+                is_correct INTEGER,
+                score INTEGER,
+                attempt_date TEXT,
+                attempt_id TEXT
+            )
+            """,
+            _add_attempt_id_column,
+            # COUNT(DISTINCT attempt_id) per student/subject, index-only
+            """
+            CREATE INDEX IF NOT EXISTS idx_quiz_attempts_student_subject
+            ON quiz_attempts (student_name, subject, attempt_id)
+            """,
+            # per-question correctness, index-only
+            """
+            CREATE INDEX IF NOT EXISTS idx_quiz_attempts_qid
+            ON quiz_attempts (qid, is_correct)
+            """,
+        ],
+    ),
+    (
+        3,
+        "quiz_attempts_legacy for attempts recorded before the question bank",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS quiz_attempts_legacy (
+                id INTEGER PRIMARY KEY,
+                student_name TEXT,
+                grade TEXT,
+                subject TEXT,
+                qid INTEGER,
+                question TEXT,
+                selected_answer TEXT,
+                correct_answer TEXT,
+                is_correct INTEGER,
+                score INTEGER,
+                attempt_date TEXT,
+                attempt_id TEXT
+            )
+            """,
+            _archive_legacy_attempts,
+            # legacy attempts still count towards the attempt limit
+            """
+            CREATE INDEX IF NOT EXISTS idx_quiz_attempts_legacy_student_subject
+            ON quiz_attempts_legacy (student_name, subject, attempt_id)
+            """,
+        ],
+    ),
+]
+
+
+def get_schema_version(db_name=DB_NAME):
+    with connection(db_name) as conn:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def run_migrations(migrations=STUDENT_DB_MIGRATIONS, db_name=DB_NAME):
+    """Apply every migration newer than the stored schema version, in order"""
+    with connection(db_name) as conn:
+        current = get_schema_version(db_name)
+        for version, description, steps in migrations:
+            if version <= current:
+                continue
+            # IMMEDIATE takes the write lock up front so two processes starting
+            # together cannot both apply the same migration.
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                current = get_schema_version(db_name)
+                if version <= current:
+                    conn.rollback()
+                    continue
+                c = conn.cursor()
+                for step in steps:
+                    if callable(step):
+                        step(c)
+                    else:
+                        c.execute(step)
+                c.execute(f"PRAGMA user_version = {int(version)}")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            logger.info("Applied migration %d: %s", version, description)
+            current = version
+        return current
@@ -0,0 +1,160 @@
+# perf_trace.py per-rerun timing spans for the Streamlit app
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# PERF_TRACE=1 traces every rerun; otherwise only sessions that turn on the
+# sidebar panel are traced. Finished reruns are appended to PERF_TRACE_FILE
+# as JSON lines (set it empty to keep traces in memory only).
+PERF_TRACE = os.getenv("PERF_TRACE", "0") == "1"
+PERF_TRACE_FILE = os.getenv("PERF_TRACE_FILE", "perf_trace.jsonl")
+
+# Spans attach to the trace of the thread running the script, so work on
+# background threads (question bank refill, OCR pool) is not counted.
+_local = threading.local()
+_export_lock = threading.Lock()
+
+
+class RerunTrace:
+    """Spans recorded during one run of the app script"""
+
+    def __init__(self, **meta):
+        self.meta = meta
+        self.started_at = datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+        self.spans = []  # (name, offset_ms, duration_ms, depth, failed)
+        self.total_ms = None
+        self.finished = False
+        self._start = time.perf_counter()
+        self._depth = 0
+
+    def finish(self, cut_short=False):
+        """
+        Stop the clock. A rerun cut short by st.stop()/st.rerun() is only
+        closed when the next one starts, so it ends at its last span instead.
+        """
+        if self.finished:
+            return
+        if cut_short:
+            self.total_ms = max((s[1] + s[2] for s in self.spans), default=0.0)
+        else:
+            self.total_ms = (time.perf_counter() - self._start) * 1000
+        self.finished = True
+
+    def summary(self):
+        """[(name, count, total_ms, max_ms)], largest total first"""
+        totals = {}
+        for name, _, duration, _, _ in self.spans:
+            count, total, longest = totals.get(name, (0, 0.0, 0.0))
+            totals[name] = (count + 1, total + duration, max(longest, duration))
+        rows = [(name, *values) for name, values in totals.items()]
+        return sorted(rows, key=lambda row: row[2], reverse=True)
+
+    def to_record(self):
+        return {
+            **self.meta,
+            "started_at": self.started_at,
+            "total_ms": round(self.total_ms or 0.0, 3),
+            "summary": [
+                {"name": n, "count": c, "total_ms": round(t, 3), "max_ms": round(m, 3)}
+                for n, c, t, m in self.summary()
+            ],
+            "spans": [
+                {
+                    "name": n,
+                    "offset_ms": round(o, 3),
+                    "duration_ms": round(d, 3),
+                    "depth": depth,
+                    "failed": failed,
+                }
+                for n, o, d, depth, failed in self.spans
+            ],
+        }
+
+
+def begin_rerun(previous=None, enabled=True, **meta):
+    """
+    Start tracing this rerun on the calling thread and return its trace, or
+    None when tracing is off. `previous` is the last rerun's trace; if it was
+    cut short it is closed and exported here.
+    """
+    if previous is not None and not previous.finished:
+        previous.finish(cut_short=True)
+        export(previous)
+    trace = RerunTrace(**meta) if enabled else None
+    _local.trace = trace
+    return trace
+
+
+def end_rerun(trace):
+    """Finish and export the trace at the end of the script"""
+    if getattr(_local, "trace", None) is trace:
+        _local.trace = None
+    if trace is not None and not trace.finished:
+        trace.finish()
+        export(trace)
+
+
+def export(trace, path=None):
+    path = PERF_TRACE_FILE if path is None else path
+    if not path:
+        return
+    line = json.dumps(trace.to_record())
+    with _export_lock, open(path, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+
+@contextmanager
+def span(name):
+    """Time the block as `name` in the current rerun's trace (no-op if none)"""
+    trace = getattr(_local, "trace", None)
+    if trace is None:
+        yield
+        return
+    depth = trace._depth
+    trace._depth += 1
+    start = time.perf_counter()
+    failed = False
+    try:
+        yield
+    except Exception:
+        # st.stop()/st.rerun() raise BaseException subclasses and are not failures
+        failed = True
+        raise
+    finally:
+        end = time.perf_counter()
+        trace._depth = depth
+        trace.spans.append(
+            (
+                name,
+                (start - trace._start) * 1000,
+                (end - start) * 1000,
+                depth,
+                failed,
+            )
+        )
+
+
+def traced(name=None):
+    """
+    Decorator form of span(); the default name is module.qualname.
+    Usable bare (@traced) or with a name (@traced("llm.chat")).
+    """
+
+    def decorate(func, span_name):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if getattr(_local, "trace", None) is None:
+                return func(*args, **kwargs)
+            with span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    if callable(name):
+        func = name
+        return decorate(func, f"{func.__module__}.{func.__qualname__}")
+    return lambda func: decorate(func, name or f"{func.__module__}.{func.__qualname__}")
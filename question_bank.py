@@ -0,0 +1,243 @@
+# question_bank.py pre-generated quiz questions in quiz.db with background refill
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+
+from answer_cache import normalize_question
+from db_pool import QUIZ_DB_NAME, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+# Stock is the number of unretired questions for a (grade, subject). Serving a
+# question counts towards QUESTION_MAX_SERVES, after which it is retired; a
+# refill is queued as soon as stock drops below the low watermark and tops it
+# back up to the high watermark.
+QUESTION_BANK_LOW_WATERMARK = int(os.getenv("QUESTION_BANK_LOW_WATERMARK", "15"))
+QUESTION_BANK_HIGH_WATERMARK = int(os.getenv("QUESTION_BANK_HIGH_WATERMARK", "40"))
+QUESTION_BANK_REFILL_BATCH = int(os.getenv("QUESTION_BANK_REFILL_BATCH", "10"))
+QUESTION_MAX_SERVES = int(os.getenv("QUESTION_MAX_SERVES", "5"))
+REFILL_MAX_CALLS = 6  # generator calls per refill, in case most come back as duplicates
+INLINE_REFILL_MAX_CALLS = 2  # while a student is waiting
+QUESTION_OPTION_COUNT = 3
+QUESTION_INSERT_BATCH = 5  # questions written per transaction while a refill streams in
+
+
+def validate_question(q):
+    """Return (question, options, correct) from a generated item, or None if malformed"""
+    if not isinstance(q, dict):
+        return None
+    question, options, correct = q.get("question"), q.get("options"), q.get("correct")
+    if not isinstance(question, str) or not question.strip():
+        return None
+    if not isinstance(options, list) or len(options) != QUESTION_OPTION_COUNT:
+        return None
+    options = [str(o) for o in options]
+    if str(correct) not in options or len(set(options)) != len(options):
+        return None
+    return question.strip(), options, str(correct)
+
+
+class QuestionBank:
+    """
+    Serves quiz questions from quiz.db with an indexed random pick and keeps
+    each (grade, subject) stocked from a background worker thread.
+
+    `generator(grade, subject, limit)` returns an iterable of dicts with
+    "question", "options" and "correct" (it may yield them while they are
+    still being generated); it is only called by the worker, or inline when a
+    bucket is too empty to serve a quiz at all.
+    """
+
+    def __init__(self, generator, db_name=QUIZ_DB_NAME):
+        self.generator = generator
+        self.db_name = db_name
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._worker = None
+
+    # ----------------------------
+    # Storage
+    # ----------------------------
+    INSERT_SQL = """
+        INSERT OR IGNORE INTO question_bank
+        (grade, subject, question, question_norm, options, correct, rand, served_count, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+
+    def _row(self, grade, subject, item, served_count=0):
+        valid = validate_question(item)
+        if valid is None:
+            return None
+        question, options, correct = valid
+        return (
+            str(grade),
+            subject,
+            question,
+            normalize_question(question),
+            json.dumps(options),
+            correct,
+            random.random(),
+            served_count,
+            time.time(),
+        )
+
+    def add_questions(self, grade, subject, items):
+        """
+        Insert generated questions as they arrive, skipping malformed ones and
+        duplicates; returns rows added. Questions received before `items`
+        fails (a parse or network error mid-stream) are still stored.
+        """
+        added, batch = 0, []
+        try:
+            for item in items:
+                row = self._row(grade, subject, item)
+                if row:
+                    batch.append(row)
+                if len(batch) >= QUESTION_INSERT_BATCH:
+                    added += self._insert(batch)
+                    batch = []
+        finally:
+            if batch:
+                added += self._insert(batch)
+        return added
+
+    def _insert(self, rows):
+        with transaction(self.db_name) as c:
+            before = c.connection.total_changes
+            c.executemany(self.INSERT_SQL, rows)
+            return c.connection.total_changes - before
+
+    def add_served_question(self, grade, subject, item):
+        """
+        Insert one question that is being served right away.
+        Returns (qid, question, options_json, correct), or None if the item
+        is malformed or already in the bank.
+        """
+        row = self._row(grade, subject, item, served_count=1)
+        if row is None:
+            return None
+        with transaction(self.db_name) as c:
+            c.execute(self.INSERT_SQL, row)
+            if c.rowcount != 1:
+                return None
+            return (c.lastrowid, row[2], row[4], row[5])
+
+    def stock(self, grade, subject):
+        with connection(self.db_name) as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM question_bank WHERE grade = ? AND subject = ? AND retired = 0",
+                (str(grade), subject),
+            ).fetchone()[0]
+
+    def _pick(self, grade, subject, limit):
+        # Start at a random point of the (grade, subject, retired, rand)
+        # index and wrap around to the beginning if the tail is too short
+        with connection(self.db_name) as conn:
+            sql = """
+                SELECT id, question, options, correct FROM question_bank
+                WHERE grade = ? AND subject = ? AND retired = 0 AND rand >= ?
+                ORDER BY rand LIMIT ?
+            """
+            start = random.random()
+            rows = conn.execute(sql, (str(grade), subject, start, limit)).fetchall()
+            if len(rows) < limit:
+                seen = {r[0] for r in rows}
+                wrapped = conn.execute(sql, (str(grade), subject, 0.0, limit)).fetchall()
+                rows += [r for r in wrapped if r[0] not in seen][: limit - len(rows)]
+            return rows
+
+    def _mark_served(self, ids):
+        with transaction(self.db_name) as c:
+            c.executemany(
+                """
+                UPDATE question_bank
+                SET served_count = served_count + 1,
+                    retired = (served_count + 1 >= ?)
+                WHERE id = ?
+                """,
+                [(QUESTION_MAX_SERVES, qid) for qid in ids],
+            )
+
+    def iter_questions(self, grade, subject, limit=3):
+        """
+        Yield up to `limit` questions as (qid, question, options_json, correct).
+        Stock is served first; when the bucket cannot fill the quiz, new
+        questions are generated inline and yielded one by one as they arrive.
+        """
+        rows = self._pick(grade, subject, limit)
+        if rows:
+            self._mark_served([r[0] for r in rows])
+        served = len(rows)
+        yield from (tuple(r) for r in rows)
+
+        for _ in range(INLINE_REFILL_MAX_CALLS):
+            if served >= limit:
+                break
+            for item in self.generator(grade, subject, limit - served):
+                row = self.add_served_question(grade, subject, item)
+                if row:
+                    served += 1
+                    yield row
+                    if served >= limit:
+                        break
+
+        if self.stock(grade, subject) < QUESTION_BANK_LOW_WATERMARK:
+            self.request_refill(grade, subject)
+
+    def get_questions(self, grade, subject, limit=3):
+        return list(self.iter_questions(grade, subject, limit))
+
+    # ----------------------------
+    # Refill
+    # ----------------------------
+    def refill(self, grade, subject, target=QUESTION_BANK_HIGH_WATERMARK, max_calls=REFILL_MAX_CALLS):
+        """Generate questions until the stock reaches `target`; returns rows added"""
+        added = 0
+        for _ in range(max_calls):
+            missing = target - self.stock(grade, subject)
+            if missing <= 0:
+                break
+            items = self.generator(grade, subject, min(QUESTION_BANK_REFILL_BATCH, missing))
+            added += self.add_questions(grade, subject, items)
+        return added
+
+    def request_refill(self, grade, subject):
+        """Queue a background refill unless one is already pending"""
+        key = (str(grade), subject)
+        with self._lock:
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="question-bank-refill", daemon=True)
+                self._worker.start()
+        self._queue.put(key)
+        return True
+
+    def wait_for_refills(self, timeout=None):
+        """Block until no refill is queued or running; False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                if not self._pending:
+                    return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+
+    def _run(self):
+        while True:
+            grade, subject = self._queue.get()
+            try:
+                added = self.refill(grade, subject)
+                logger.info("Question bank: added %d questions for grade %s %s", added, grade, subject)
+            except Exception:
+                logger.exception("Question bank refill failed for grade %s %s", grade, subject)
+            finally:
+                with self._lock:
+                    self._pending.discard((grade, subject))
@@ -0,0 +1,87 @@
+# quiz_db.py quiz.db schema and quiz attempt storage
+import uuid
+from datetime import date
+
+from db_pool import QUIZ_DB_NAME, connection, transaction
+from migrations import QUIZ_DB_MIGRATIONS, run_migrations
+
+
+def init_quiz_db():
+    """Create/upgrade the quiz.db schema"""
+    run_migrations(QUIZ_DB_MIGRATIONS, QUIZ_DB_NAME)
+
+
+def record_quiz_attempt(student_name, grade, subject, results, attempt_id=None):
+    """
+    Store one submitted quiz in a single transaction.
+    results: [(qid, question, selected_answer, correct_answer)]
+    Returns the attempt_id shared by the attempt's rows.
+    """
+    attempt_id = attempt_id or str(uuid.uuid4())
+    score = sum(1 for _, _, selected, correct in results if selected == correct)
+    today = date.today().isoformat()
+    rows = [
+        (
+            student_name,
+            grade,
+            subject,
+            qid,
+            question,
+            selected,
+            correct,
+            int(selected == correct),
+            score,
+            today,
+            attempt_id,
+        )
+        for qid, question, selected, correct in results
+    ]
+    with transaction(QUIZ_DB_NAME) as c:
+        c.executemany(
+            """
+            INSERT INTO quiz_attempts
+            (student_name, grade, subject, qid, question, selected_answer,
+             correct_answer, is_correct, score, attempt_date, attempt_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            rows,
+        )
+    return attempt_id
+
+
+def get_attempt_count(student_name, subject):
+    """Number of submitted quizzes for a student and subject, including legacy ones"""
+    with connection(QUIZ_DB_NAME) as conn:
+        return conn.execute(
+            """
+            SELECT COUNT(DISTINCT attempt_id) FROM (
+                SELECT attempt_id FROM quiz_attempts
+                WHERE student_name = :student AND subject = :subject
+                UNION ALL
+                SELECT attempt_id FROM quiz_attempts_legacy
+                WHERE student_name = :student AND subject = :subject
+            )
+            """,
+            {"student": student_name, "subject": subject},
+        ).fetchone()[0]
+
+
+def get_question_stats(qids):
+    """
+    Return {qid: (times_answered, times_correct)} for the given question bank
+    ids; attempts from before the bank are in quiz_attempts_legacy
+    """
+    qids = list(qids)
+    if not qids:
+        return {}
+    placeholders = ",".join("?" * len(qids))
+    with connection(QUIZ_DB_NAME) as conn:
+        rows = conn.execute(
+            f"""
+            SELECT qid, COUNT(*), SUM(is_correct) FROM quiz_attempts
+            WHERE qid IN ({placeholders})
+            GROUP BY qid
+            """,
+            qids,
+        ).fetchall()
+    return {qid: (answered, correct or 0) for qid, answered, correct in rows}
@@ -1,9 +1,17 @@
 import os
 import json
-import uuid
+import logging
 import streamlit as st
-import openai
 from dotenv import load_dotenv
+from json_stream import JSONObjectStream
+from llm_client import get_openai_client
+from mastery import record_answers
+from perf_trace import traced
+from question_bank import QuestionBank
+from quiz_db import get_attempt_count, init_quiz_db, record_quiz_attempt
+from subject_classifier import detect_topic
+
+logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
@@ -13,23 +21,15 @@ print(f"Loaded OPENAI_API_KEY: {repr(OPENAI_API_KEY)}")
 if not OPENAI_API_KEY:
     raise RuntimeError("❌ Missing OPENAI_API_KEY environment variable.")
 
-openai.api_key = OPENAI_API_KEY
-
-
-def clean_json_response(content: str):
-    """Remove markdown fences and extract JSON only."""
-    content = content.strip()
-    if content.startswith("```"):
-        content = content.strip("`")
-        if content.lower().startswith("json"):
-            content = content[4:].strip()
-    if "[" in content and "]" in content:
-        content = content[content.find("[") : content.rfind("]") + 1]
-    return content
+MAX_QUIZ_ATTEMPTS = 2  # submitted quizzes per student and subject
 
 
-def get_quiz_questions(grade, subject, limit=3):
-    """Fetch quiz questions dynamically from OpenAI using new API (>=1.0.0)."""
+def generate_quiz_questions(grade, subject, limit=3):
+    """
+    Generate new quiz questions with OpenAI, yielding each question object as
+    soon as it is complete in the streamed response.
+    Malformed objects are skipped; the question bank validates the rest.
+    """
 
     prompt = f"""
     Generate {limit} multiple-choice quiz questions for Grade {grade} in {subject}.
@@ -50,40 +50,51 @@ def get_quiz_questions(grade, subject, limit=3):
     ]
     """
 
+    # Shared client: reuses pooled keep-alive connections
+    client = get_openai_client(OPENAI_API_KEY)
+    stream = client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.7,
+        stream=True,
+    )
+
+    parser = JSONObjectStream()
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            yield from parser.feed(delta)
+    if parser.errors:
+        logger.warning("Quiz generation: skipped %d malformed question(s)", parser.errors)
+
+
+# Questions are served from the quiz.db bank; OpenAI is only called by its
+# background refill (or inline for a grade/subject that has no stock yet).
+question_bank = QuestionBank(generate_quiz_questions)
+
+
+@traced
+def get_quiz_questions(grade, subject, limit=3, on_question=None):
+    """
+    Pick quiz questions from the question bank as (qid, question, options_json, correct).
+    on_question is called with each question as soon as it is available;
+    questions obtained before a generation error are still returned.
+    """
+    questions = []
     try:
-        # New API syntax
-        client = openai.OpenAI()
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7,
-        )
-
-        content = response.choices[0].message.content.strip()
-        if not content:
-            raise ValueError("Empty AI response")
-
-        content = clean_json_response(content)
-        questions = json.loads(content)
-
-        formatted = []
-        for q in questions:
-            formatted.append(
-                (
-                    q.get("id", str(uuid.uuid4())),
-                    q["question"],
-                    json.dumps(q["options"]),
-                    q["correct"],
-                )
-            )
-        return formatted
-
+        for q in question_bank.iter_questions(grade, subject, limit):
+            questions.append(q)
+            if on_question:
+                on_question(q)
     except Exception as e:
         st.error(f"⚠️ AI Question generation failed: {e}")
 
-    return []
+    return questions
 
 
+@traced
 def quiz_component():
     """Streamlit UI for AI-powered quiz."""
     st.header(" Quiz")
@@ -93,43 +104,66 @@ def quiz_component():
     grade = st.selectbox("Select Grade", ["6", "7", "8"])
     subject = st.selectbox("Select Subject", ["Math", "Science", "English"])
 
-    if "attempts" not in st.session_state:
-        st.session_state.attempts = {}  # {student: {subject: count}}
-
-    if student:
-        st.session_state.attempts.setdefault(student, {}).setdefault(subject, 0)
-
     # Button to start quiz
     if st.button("🎯 Generate Quiz"):
         if not student:
             st.warning("Please enter student name first!")
         else:
-            attempts_used = st.session_state.attempts[student][subject]
-            if attempts_used >= 2:
-                st.error(f"❌ Maximum 2 attempts reached for {subject}!")
+            # Attempts are stored in quiz.db so the limit survives new sessions
+            attempts_used = get_attempt_count(student, subject)
+            if attempts_used >= MAX_QUIZ_ATTEMPTS:
+                st.error(f"❌ Maximum {MAX_QUIZ_ATTEMPTS} attempts reached for {subject}!")
                 st.session_state.questions = []  # clear quiz
             else:
+                # Show questions while a fresh batch is still being generated
+                preview = st.empty()
+                ready = []
+
+                def show_progress(q):
+                    ready.append(q[1])
+                    preview.info(
+                        f"✍️ Preparing quiz ({len(ready)}/3 ready)\n\n"
+                        + "\n".join(f"{i}. {text}" for i, text in enumerate(ready, start=1))
+                    )
+
                 st.session_state.questions = get_quiz_questions(
-                    grade=grade, subject=subject, limit=3
+                    grade=grade, subject=subject, limit=3, on_question=show_progress
                 )
+                preview.empty()
                 st.session_state.answers = {}
                 st.session_state.submitted = False
 
     # Show quiz only if questions exist
     if student and "questions" in st.session_state and st.session_state.questions:
-        for qid, question, options_json, correct in st.session_state.questions:
-            st.subheader(f"Q{qid}: {question}")
+        # qid is the question bank id; number the questions 1..n for display
+        for number, (qid, question, options_json, correct) in enumerate(
+            st.session_state.questions, start=1
+        ):
+            st.subheader(f"Q{number}: {question}")
             options = json.loads(options_json)
             st.session_state.answers[qid] = st.radio(
-                f"Choose answer for Q{qid}", options, key=f"q{qid}"
+                f"Choose answer for Q{number}", options, key=f"q{qid}"
             )
 
         if st.button("✅ Submit Answers"):
             if st.session_state.submitted:
                 st.warning("You already submitted this attempt.")
             else:
+                results = [
+                    (qid, question, st.session_state.answers.get(qid), correct)
+                    for qid, question, options_json, correct in st.session_state.questions
+                ]
+                # One transaction for the whole attempt
+                record_quiz_attempt(student, f"Grade {grade}", subject, results)
+                record_answers(
+                    student,
+                    subject,
+                    [
+                        (detect_topic(question, subject), selected == correct)
+                        for _, question, selected, correct in results
+                    ],
+                )
                 st.session_state.submitted = True
-                st.session_state.attempts[student][subject] += 1
 
     # Results after submit
     if student and st.session_state.get("submitted", False):
@@ -137,20 +171,23 @@ def quiz_component():
         total = len(st.session_state.questions)
         st.write("### 📊 Results:")
 
-        for qid, question, options_json, correct in st.session_state.questions:
+        for number, (qid, question, options_json, correct) in enumerate(
+            st.session_state.questions, start=1
+        ):
             user_answer = st.session_state.answers.get(qid)
             if user_answer == correct:
-                st.success(f"Q{qid}: ✅ Correct! ({question})")
+                st.success(f"Q{number}: ✅ Correct! ({question})")
                 score += 1
             else:
-                st.error(f"Q{qid}: ❌ Wrong. Correct answer: {correct}")
+                st.error(f"Q{number}: ❌ Wrong. Correct answer: {correct}")
 
         st.info(f"Final Score: {score}/{total}")
         st.info(
-            f"Attempts used: {st.session_state.attempts[student][subject]}/2 for {subject}"
+            f"Attempts used: {get_attempt_count(student, subject)}/{MAX_QUIZ_ATTEMPTS} for {subject}"
         )
 
 
 # Run the app
 if __name__ == "__main__":
+    init_quiz_db()
     quiz_component()
@@ -1,16 +1,24 @@
 # create current streak and week topic suggest
-import sqlite3
 import json
-from datetime import datetime, timedelta
-
-DB_NAME = "student.db"
+from datetime import datetime
+from db_pool import connection, transaction, utc_timestamp
+from documents import store_document
+from mastery import observe
+from migrations import run_migrations
+from perf_trace import traced
+from subject_classifier import detect_topic
 
 
 def init_db():
     """Initialize main student database with enhanced tables"""
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
+    with transaction() as c:
+        _create_tables(c)
+
+    # Indexes and later schema changes
+    run_migrations()
+
 
+def _create_tables(c):
     # Basic interactions table
     c.execute(
         """
@@ -79,138 +87,212 @@ def init_db():
     """
     )
 
-    conn.commit()
-    conn.close()
-
 
 # ---------------------- Interactions ----------------------
 
 
-def log_interaction(student_name, grade, subject, question, answer, resources=""):
-    conn = sqlite3.connect("student.db")
-    c = conn.cursor()
-    c.execute(
-        """
-        INSERT INTO interactions (student, grade, subject, question, answer, resources, created_at)
-        VALUES (?, ?, ?, ?, ?, ?, datetime('now'))
-    """,
-        (student_name, grade, subject, question, answer, resources),
-    )
-    conn.commit()
-    inter_id = c.lastrowid
-    conn.close()
+@traced
+def log_interaction(
+    student_name, grade, subject, question, answer, resources="", document_text=None
+):
+    """
+    Store one tutor exchange. For file-based questions pass the student's own
+    question and the extracted file text as document_text; the text is stored
+    once per distinct content in the documents table.
+    """
+    created_at = utc_timestamp()
+    with transaction() as c:
+        document_hash = store_document(c, document_text) if document_text else None
+        c.execute(
+            """
+            INSERT INTO interactions (student, grade, subject, question, answer, resources, document_hash, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+            (student_name, grade, subject, question, answer, resources, document_hash, created_at),
+        )
+        inter_id = c.lastrowid
+        c.execute(
+            """
+            INSERT INTO interaction_rollup (student, grade, subject, day, questions, neutral)
+            VALUES (IFNULL(?, ''), IFNULL(?, ''), IFNULL(?, ''), date(?), 1, 1)
+            ON CONFLICT (student, grade, subject, day) DO UPDATE SET
+                questions = questions + 1,
+                neutral = neutral + 1
+        """,
+            (student_name, grade, subject, created_at),
+        )
     return inter_id
 
 
-def get_recent_interactions(student_name, grade, limit=10):
-    conn = sqlite3.connect("student.db")
-    c = conn.cursor()
-    c.execute(
-        """
-        SELECT id, question, answer, resources, feedback, feedback_comment, created_at
-        FROM interactions
-        WHERE student = ? AND grade = ?
-        ORDER BY created_at DESC
-        LIMIT ?
-    """,
-        (student_name, grade, limit),
-    )
-    rows = c.fetchall()
-    conn.close()
-    return rows
+HISTORY_PREVIEW_LENGTH = 120  # characters of the question kept in history rows
 
 
-def set_feedback(inter_id, feedback_val, comment):
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute(
-        """
-        UPDATE interactions
-        SET feedback = ?, feedback_comment = ?
-        WHERE id = ?
-    """,
-        (feedback_val, comment, inter_id),
-    )
-    conn.commit()
-    conn.close()
+@traced
+def get_interaction_page(student_name, grade, limit=10, cursor=None):
+    """
+    One page of a student's history, newest first, without answers.
+    Rows are (id, question_preview, feedback, feedback_comment, created_at).
+    cursor is the (created_at, id) of the last row of the previous page;
+    returns (rows, next_cursor), next_cursor being None on the last page.
+    """
+    with connection() as conn:
+        c = conn.cursor()
+        # Keyset pagination: seek straight to the cursor on
+        # idx_interactions_history instead of skipping OFFSET rows
+        after_cursor = "AND (created_at, id) < (?, ?)" if cursor else ""
+        c.execute(
+            f"""
+            SELECT id, substr(question, 1, ?), feedback, feedback_comment, created_at
+            FROM interactions
+            WHERE student = ? AND grade = ? {after_cursor}
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+        """,
+            (HISTORY_PREVIEW_LENGTH, student_name, grade, *(cursor or ()), limit + 1),
+        )
+        rows = c.fetchall()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, (rows[-1][4], rows[-1][0])
 
 
-# ---------------------- Progress ----------------------
+@traced
+def get_recent_activity(student_name, grade, limit=10):
+    """
+    (feedback, created_at) of a student's latest `limit` interactions, newest
+    first, for the progress charts; independent of the history page shown
+    """
+    with connection() as conn:
+        return conn.execute(
+            """
+            SELECT feedback, created_at FROM interactions
+            WHERE student = ? AND grade = ?
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+            """,
+            (student_name, grade, limit),
+        ).fetchall()
 
 
-def update_student_progress(
-    student_name,
-    subject,
-    topic,
-    difficulty,
-    mastery_score,
-    struggle_areas,
-    learning_style,
-):
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute(
-        """
-        SELECT id, total_sessions FROM student_progress
-        WHERE student_name = ? AND subject = ? AND topic = ?
-    """,
-        (student_name, subject, topic),
-    )
-    row = c.fetchone()
-    if row:
-        pid, total_sessions = row
+@traced
+def get_interaction_detail(inter_id):
+    """
+    (question, answer, resources, document_hash) of one interaction, loaded
+    on demand; fetch the file text with documents.get_document if needed
+    """
+    with connection() as conn:
+        c = conn.cursor()
+        c.execute(
+            "SELECT question, answer, resources, document_hash FROM interactions WHERE id = ?",
+            (inter_id,),
+        )
+        return c.fetchone()
+
+
+def _feedback_column(feedback_val):
+    return {1: "helpful", -1: "not_helpful"}.get(feedback_val, "neutral")
+
+
+@traced
+def set_feedback(inter_id, feedback_val, comment):
+    # IMMEDIATE locks out other writers before the old rating is read, so two
+    # concurrent ratings cannot both move it out of the same rollup bucket
+    with transaction(immediate=True) as c:
+        row = c.execute(
+            """
+            SELECT student, grade, subject, question, feedback, date(created_at)
+            FROM interactions WHERE id = ?
+        """,
+            (inter_id,),
+        ).fetchone()
         c.execute(
             """
-            UPDATE student_progress
-            SET difficulty_level=?, mastery_score=?, struggle_areas=?, learning_style=?, last_session=?, total_sessions=?
-            WHERE id=?
+            UPDATE interactions
+            SET feedback = ?, feedback_comment = ?
+            WHERE id = ?
         """,
-            (
-                difficulty,
-                mastery_score,
-                struggle_areas,
-                learning_style,
-                datetime.now(),
-                total_sessions + 1,
-                pid,
-            ),
+            (feedback_val, comment, inter_id),
         )
-    else:
+        if not row:
+            return
+        student, grade, subject, question, old_val, day = row
+
+        # Move the interaction to its new feedback bucket in the rollup
+        old_col, new_col = _feedback_column(old_val), _feedback_column(feedback_val)
+        if old_col != new_col:
+            c.execute(
+                f"""
+                UPDATE interaction_rollup
+                SET {old_col} = {old_col} - 1, {new_col} = {new_col} + 1
+                WHERE student = IFNULL(?, '') AND grade = IFNULL(?, '')
+                  AND subject = IFNULL(?, '') AND day = IFNULL(?, '')
+            """,
+                (student, grade, subject, day),
+            )
+
+        # The first rating of an answer is evidence for the topic's mastery
+        if not old_val and feedback_val:
+            observe(c, student, subject, detect_topic(question, subject), feedback_val > 0, "feedback")
+
+
+# ---------------------- Dashboard ----------------------
+
+
+@traced
+def get_dashboard_students():
+    """(student, grade) pairs that have interactions"""
+    with connection() as conn:
+        c = conn.cursor()
+        c.execute(
+            """
+            SELECT DISTINCT student, grade FROM interaction_rollup
+            WHERE student != ''
+            ORDER BY student
+        """
+        )
+        return c.fetchall()
+
+
+@traced
+def get_dashboard_summary(student_name, grade):
+    """
+    Per-subject totals for the teacher dashboard from interaction_rollup:
+    [(subject, questions, helpful, not_helpful, neutral)]
+    """
+    with connection() as conn:
+        c = conn.cursor()
         c.execute(
             """
-            INSERT INTO student_progress 
-            (student_name, subject, topic, difficulty_level, mastery_score, struggle_areas, learning_style, last_session, total_sessions)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            SELECT subject, SUM(questions), SUM(helpful), SUM(not_helpful), SUM(neutral)
+            FROM interaction_rollup
+            WHERE student = ? AND grade = ?
+            GROUP BY subject
         """,
-            (
-                student_name,
-                subject,
-                topic,
-                difficulty,
-                mastery_score,
-                struggle_areas,
-                learning_style,
-                datetime.now(),
-                1,
-            ),
+            (student_name, grade),
         )
-    conn.commit()
-    conn.close()
+        return c.fetchall()
 
 
+# ---------------------- Progress ----------------------
+
+
+# Mastery and session counts are written by mastery.py
+
+
+@traced
 def get_student_progress(student_name, subject):
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute(
-        """
-        SELECT * FROM student_progress
-        WHERE student_name=? AND subject=?
-        ORDER BY last_session DESC
-    """,
-        (student_name, subject),
-    )
-    rows = c.fetchall()
-    conn.close()
+    with connection() as conn:
+        c = conn.cursor()
+        c.execute(
+            """
+            SELECT * FROM student_progress
+            WHERE student_name=? AND subject=?
+            ORDER BY last_session DESC
+        """,
+            (student_name, subject),
+        )
+        rows = c.fetchall()
     return rows
 
 
@@ -228,97 +310,91 @@ def parse_date(date_str):
     return None
 
 
+# Same day keeps the streak, the next day extends it, any longer gap resets it.
+# Badges are appended only if not already present.
+GAMIFICATION_UPSERT_SQL = """
+    INSERT INTO gamification
+    (student_name, xp_points, streak, badges, last_activity, daily_interactions)
+    VALUES (:student, :xp, 1, :badges, :now, 1)
+    ON CONFLICT (student_name) DO UPDATE SET
+        xp_points = COALESCE(gamification.xp_points, 0) + excluded.xp_points,
+        streak = CASE
+            WHEN date(gamification.last_activity) = date(excluded.last_activity)
+                THEN gamification.streak
+            WHEN date(gamification.last_activity) = date(excluded.last_activity, '-1 day')
+                THEN gamification.streak + 1
+            ELSE 1
+        END,
+        daily_interactions = CASE
+            WHEN date(gamification.last_activity) = date(excluded.last_activity)
+                THEN gamification.daily_interactions + 1
+            ELSE 1
+        END,
+        badges = CASE
+            WHEN :badge IS NULL OR EXISTS (
+                SELECT 1 FROM json_each(COALESCE(NULLIF(gamification.badges, ''), '[]'))
+                WHERE value = :badge
+            )
+                THEN gamification.badges
+            ELSE json_insert(
+                COALESCE(NULLIF(gamification.badges, ''), '[]'), '$[#]', :badge
+            )
+        END,
+        last_activity = excluded.last_activity
+"""
+
+
+def gamification_event(student_name, xp=0, badge=None, when=None):
+    """Parameters for one GAMIFICATION_UPSERT_SQL execution"""
+    return {
+        "student": student_name,
+        "xp": xp,
+        "badges": json.dumps([badge] if badge else []),
+        "badge": badge or None,
+        "now": when or datetime.now(),
+    }
+
+
 def update_gamification(student_name, xp=0, badge=None):
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute(
-        """
-        SELECT id, xp_points, streak, badges, last_activity, daily_interactions
-        FROM gamification
-        WHERE student_name=?
-    """,
-        (student_name,),
-    )
-    row = c.fetchone()
+    """Add XP (and optionally a badge) and advance the daily streak in one upsert"""
+    update_gamification_many([gamification_event(student_name, xp, badge)])
 
-    today = datetime.now().date()
 
-    if row:
-        gid, curr_xp, curr_streak, badges_json, last_activity, daily_interactions = row
-        new_xp = curr_xp + xp
-
-        last_date = parse_date(last_activity) if last_activity else None
-        if last_date:
-            if last_date.date() == today:
-                new_streak = curr_streak
-                daily_interactions += 1
-            elif last_date.date() == today - timedelta(days=1):
-                new_streak = curr_streak + 1
-                daily_interactions = 1
-            else:
-                new_streak = 1
-                daily_interactions = 1
-        else:
-            new_streak = 1
-            daily_interactions = 1
-
-        badge_list = json.loads(badges_json) if badges_json else []
-        if badge and badge not in badge_list:
-            badge_list.append(badge)
+@traced
+def update_gamification_many(events):
+    """Apply gamification events in order, in a single transaction"""
+    with transaction() as c:
+        c.executemany(GAMIFICATION_UPSERT_SQL, events)
 
+
+@traced
+def get_gamification(student_name):
+    with connection() as conn:
+        c = conn.cursor()
         c.execute(
             """
-            UPDATE gamification
-            SET xp_points=?, streak=?, badges=?, last_activity=?, daily_interactions=?
-            WHERE id=?
-        """,
-            (
-                new_xp,
-                new_streak,
-                json.dumps(badge_list),
-                datetime.now(),
-                daily_interactions,
-                gid,
-            ),
-        )
-    else:
-        badges_list = [badge] if badge else []
-        c.execute(
-            """
-            INSERT INTO gamification
-            (student_name, xp_points, streak, badges, last_activity, daily_interactions)
-            VALUES (?, ?, ?, ?, ?, ?)
+            SELECT xp_points, streak, badges, last_activity, daily_interactions
+            FROM gamification
+            WHERE student_name=?
         """,
-            (student_name, xp, 1, json.dumps(badges_list), datetime.now(), 1),
+            (student_name,),
         )
-
-    conn.commit()
-    conn.close()
-
-
-def get_gamification(student_name):
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute(
-        """
-        SELECT xp_points, streak, badges FROM gamification
-        WHERE student_name=?
-    """,
-        (student_name,),
-    )
-    row = c.fetchone()
-    conn.close()
+        row = c.fetchone()
     if row:
-        xp, streak, badges = row
+        xp, streak, badges, last_activity, daily_interactions = row
         badge_list = json.loads(badges) if badges else []
         return {
             "xp": xp,
             "streak": streak,
             "badges": badge_list,
+            "last_activity": parse_date(last_activity),
+            "daily_interactions": daily_interactions,
         }
     else:
-        return {"xp": 0, "streak": 0, "badges": []}
-
-
-# Auto-init DB
-init_db()
+        return {
+            "xp": 0,
+            "streak": 0,
+            "badges": [],
+            "last_activity": None,
+            "daily_interactions": 0,
+        }
@@ -1,37 +1,37 @@
 # student_utils.py for week topic sugeestion
-import sqlite3
 import json
 
-DB_NAME = "student.db"
+from db_pool import connection
+from perf_trace import traced
 
 
+@traced
 def get_student_weak_topics(student_name, grade=None):
     """
     Returns weak topics and detailed examples for a given student,
     optionally filtered by grade.
     """
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    if grade:
-        c.execute(
-            """
-            SELECT subject, question, answer, resources, feedback
-            FROM interactions
-            WHERE student=? AND grade=? 
-        """,
-            (student_name, grade),
-        )
-    else:
-        c.execute(
-            """
-            SELECT subject, question, answer, resources, feedback
-            FROM interactions
-            WHERE student=? 
-        """,
-            (student_name,),
-        )
-    rows = c.fetchall()
-    conn.close()
+    with connection() as conn:
+        c = conn.cursor()
+        if grade:
+            c.execute(
+                """
+                SELECT subject, question, answer, resources, feedback
+                FROM interactions
+                WHERE student=? AND grade=? AND feedback = -1
+            """,
+                (student_name, grade),
+            )
+        else:
+            c.execute(
+                """
+                SELECT subject, question, answer, resources, feedback
+                FROM interactions
+                WHERE student=? AND feedback = -1
+            """,
+                (student_name,),
+            )
+        rows = c.fetchall()
 
     # Compute weak topics based on negative feedback
     topic_dict = {}
@@ -0,0 +1,612 @@
+# subject_classifier.py keyword/pattern based subject detection
+import logging
+import os
+import re
+import sqlite3
+import threading
+import zlib
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+
+from db_pool import connection
+from perf_trace import traced
+
+logger = logging.getLogger(__name__)
+
+SUBJECT_KEYWORDS = {
+    "Math": [
+        "solve",
+        "equation",
+        "algebra",
+        "geometry",
+        "numbers",
+        "calculate",
+        "formula",
+        "fraction",
+        "integral",
+        "derivative",
+        "limit",
+        "function",
+        "graph",
+        "polynomial",
+        "quadratic",
+        "linear",
+        "logarithm",
+        "trigonometry",
+        "sine",
+        "cosine",
+        "tangent",
+        "statistics",
+        "probability",
+        "mean",
+        "median",
+        "mode",
+        "matrix",
+        "vector",
+        "coordinate",
+        "angle",
+        "triangle",
+        "circle",
+        "rectangle",
+        "square",
+        "area",
+        "perimeter",
+        "volume",
+        "surface area",
+        "pythagorean",
+        "arithmetic",
+        "multiplication",
+        "division",
+        "addition",
+        "subtraction",
+        "percentage",
+        "ratio",
+        "proportion",
+        "decimal",
+        "integer",
+        "prime",
+        "composite",
+        "factor",
+        "multiple",
+        "gcd",
+        "lcm",
+        "inequality",
+        "complex number",
+        "+",
+        "-",
+        "*",
+        "/",
+        "=",
+        "<",
+        ">",
+        "≤",
+        "≥",
+        "∑",
+        "∏",
+        "∫",
+        "∆",
+    ],
+    "Science": [
+        "force",
+        "energy",
+        "motion",
+        "velocity",
+        "acceleration",
+        "gravity",
+        "friction",
+        "momentum",
+        "pressure",
+        "temperature",
+        "heat",
+        "light",
+        "sound",
+        "wave",
+        "electricity",
+        "magnetism",
+        "current",
+        "voltage",
+        "resistance",
+        "circuit",
+        "newton",
+        "law of motion",
+        "first law",
+        "second law",
+        "third law",
+        "atom",
+        "molecule",
+        "chemical",
+        "reaction",
+        "element",
+        "compound",
+        "mixture",
+        "acid",
+        "base",
+        "ph",
+        "bond",
+        "periodic table",
+        "cell",
+        "organism",
+        "dna",
+        "rna",
+        "gene",
+        "photosynthesis",
+        "ecosystem",
+        "enzyme",
+        "protein",
+        "chromosome",
+        "evolution",
+        "bacteria",
+        "virus",
+        "earthquake",
+        "volcano",
+        "rock",
+        "mineral",
+        "fossil",
+        "weather",
+        "climate",
+        "atmosphere",
+    ],
+    "English": [
+        "grammar",
+        "syntax",
+        "sentence",
+        "paragraph",
+        "noun",
+        "verb",
+        "adjective",
+        "adverb",
+        "pronoun",
+        "preposition",
+        "conjunction",
+        "interjection",
+        "subject",
+        "predicate",
+        "object",
+        "clause",
+        "phrase",
+        "tense",
+        "punctuation",
+        "comma",
+        "period",
+        "semicolon",
+        "apostrophe",
+        "quotation",
+        "essay",
+        "write",
+        "writing",
+        "composition",
+        "introduction",
+        "conclusion",
+        "thesis",
+        "argument",
+        "narrative",
+        "descriptive",
+        "persuasive",
+        "expository",
+        "literature",
+        "poem",
+        "novel",
+        "story",
+        "character",
+        "plot",
+        "theme",
+        "metaphor",
+        "simile",
+        "alliteration",
+        "rhyme",
+        "vocabulary",
+        "synonym",
+        "antonym",
+    ],
+    "General": [],
+}
+
+# Expression patterns that mark a Math question. Equivalent to the original
+# list (\d+x, x[+-*/]\d+, \d+x^\d+, f(x), [a-z]^2, \d+/\d+, √\d+, \d+%) but
+# factored so the combined regex rejects most positions on the first character.
+MATH_PATTERNS = [
+    r"\d+(?:x|/\d|%)",
+    r"x[-+*/]\d",
+    r"f\(x\)",
+    r"[a-z]\^2",
+    r"√\d",
+]
+
+# Very short keywords ("ph", "dna", "gcd") must be whole words, otherwise
+# "graph" would count as Science; longer ones match at the start of a word so
+# plurals and inflections ("equations", "atoms") still count.
+SHORT_KEYWORD_LENGTH = 3
+
+
+def _trie_pattern(terms):
+    """
+    Regex alternation factored as a prefix trie ("a(?:lgebra|ngle|rea)"), so
+    the engine rejects a position after one character instead of trying every
+    keyword. When one keyword is a prefix of another the longer one wins.
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node):
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return "(?:" + body + ")?" if "" in node else body
+
+    return build(trie)
+
+
+def _build_matcher():
+    keyword_subject = {}
+    words, short_words, symbols = [], [], []
+    for subject, keywords in SUBJECT_KEYWORDS.items():
+        for kw in keywords:
+            keyword_subject[kw] = subject
+            if not kw[0].isalnum():
+                symbols.append(kw)
+            elif len(kw) <= SHORT_KEYWORD_LENGTH:
+                short_words.append(kw)
+            else:
+                words.append(kw)
+    pattern = "|".join(
+        [
+            "(?P<pattern>" + "|".join(MATH_PATTERNS) + ")",
+            r"\b(?P<word>" + _trie_pattern(words) + ")",
+            r"\b(?P<short>" + _trie_pattern(short_words) + r")\b",
+            "(?P<symbol>" + _trie_pattern(symbols) + ")",
+        ]
+    )
+    return re.compile(pattern), keyword_subject
+
+
+# Built once at import; every call is a single scan over the text
+_MATCHER, _KEYWORD_SUBJECT = _build_matcher()
+
+
+def count_subject_hits(text):
+    """Return {subject: number of keyword/pattern hits} in one pass over text"""
+    hits = Counter()
+    for m in _MATCHER.finditer(text.lower()):
+        if m.lastgroup == "pattern":
+            hits["Math"] += 1
+        else:
+            hits[_KEYWORD_SUBJECT[m.group(m.lastgroup)]] += 1
+    return dict(hits)
+
+
+# ----------------------------
+# Weighted TF-IDF classifier
+# ----------------------------
+# Texts are turned into hashed n-gram features (word stems, 6-letter word
+# prefixes, stem bigrams, math symbols and expressions) weighted by
+# TF-IDF. Each feature has a per-subject weight: how much more often it
+# appears in that subject than in the others, learned from the interactions
+# table and seeded from SUBJECT_KEYWORDS. A text's score for a subject is its
+# L2-normalized TF-IDF vector dotted with that subject's weight column.
+HASH_BITS = 18
+N_FEATURES = 1 << HASH_BITS
+PREFIX_LENGTH = 6
+MIN_STEM_LENGTH = 3
+# Training reads the newest rows only, so startup cost stays bounded as
+# interactions grow
+TRAINING_ROW_LIMIT = int(os.getenv("CLASSIFIER_TRAINING_ROWS", "20000"))
+
+CLASSIFIER_SUBJECTS = [s for s, keywords in SUBJECT_KEYWORDS.items() if keywords]
+
+KEYWORD_PRIOR_STRENGTH = 5.0  # a keyword counts as this many labelled questions
+SYMBOL_PRIOR_WEIGHT = 0.2  # "-", "=" ... alone are weak evidence for Math
+WEIGHT_SMOOTHING = 2.0  # pseudo-count that keeps rarely seen terms from dominating
+
+MIN_SUBJECT_SCORE = 0.12  # below this a subject is not detected at all
+RELATIVE_SUBJECT_SCORE = 0.5  # secondary subjects must score this share of the best one
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+|[+\-*/=<>≤≥∑∏∫∆√^%×÷]")
+_EXPRESSION_RE = re.compile(r"\d\s*[-+*/=×÷^]\s*\d|" + "|".join(MATH_PATTERNS))
+
+
+def _stem(word):
+    """
+    Crude suffix stripping so inflections share a feature with the keyword:
+    cells/cell, commas/comma, divides/dividing/divide, studies/study
+    """
+    if len(word) <= MIN_STEM_LENGTH:
+        return word
+    if word.endswith("ies") and len(word) > MIN_STEM_LENGTH + 2:
+        return word[:-3] + "y"
+    for suffix in ("ing", "ed", "es", "s"):
+        if word.endswith(suffix) and not word.endswith(("ss", "us", "is")) and len(word) - len(suffix) >= MIN_STEM_LENGTH:
+            word = word[: -len(suffix)]
+            break
+    if word.endswith("e") and len(word) > MIN_STEM_LENGTH:
+        word = word[:-1]
+    return word
+
+
+def _text_features(text):
+    """Feature strings for one text (repeats kept: they are the term counts)"""
+    text = text.lower()
+    features = ["m:expr"] * len(_EXPRESSION_RE.findall(text))
+    words = []
+    for token in _TOKEN_RE.findall(text):
+        if token[0].isalnum():
+            word = _stem(token)
+            words.append(word)
+            features.append("w:" + word)
+            if len(token) > PREFIX_LENGTH:
+                features.append("p:" + token[:PREFIX_LENGTH])
+        else:
+            features.append("s:" + token)
+    features.extend("b:" + a + " " + b for a, b in zip(words, words[1:]))
+    return features
+
+
+def _keyword_features(keyword):
+    # Multi-word keywords only contribute their bigrams so that "of" in
+    # "law of motion" does not become a Science term
+    features = _text_features(keyword)
+    if " " in keyword:
+        return [f for f in features if f.startswith("b:")]
+    return features
+
+
+@lru_cache(maxsize=1 << 16)
+def _feature_index(feature):
+    # crc32 rather than hash(): string hashing is salted per process
+    return zlib.crc32(feature.encode("utf-8")) & (N_FEATURES - 1)
+
+
+def _hash_batch(texts):
+    """
+    Sparse term counts for a batch of texts.
+    Returns (rows, cols, counts) arrays: text index, feature index, count.
+    """
+    rows, cols = [], []
+    for i, text in enumerate(texts):
+        indices = [_feature_index(f) for f in _text_features(text or "")]
+        rows.extend([i] * len(indices))
+        cols.extend(indices)
+    if not cols:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0, dtype=np.float32)
+    keys = np.asarray(rows, dtype=np.int64) * N_FEATURES + np.asarray(cols, dtype=np.int64)
+    keys, counts = np.unique(keys, return_counts=True)
+    return keys // N_FEATURES, keys % N_FEATURES, counts.astype(np.float32)
+
+
+class SubjectClassifier:
+    """Hashed n-gram TF-IDF scorer with per-term subject weights"""
+
+    def __init__(self, subjects=None):
+        self.subjects = list(subjects or CLASSIFIER_SUBJECTS)
+        self.idf = np.ones(N_FEATURES, dtype=np.float32)
+        self.weights = np.zeros((N_FEATURES, len(self.subjects)), dtype=np.float32)
+        self.trained_on = 0
+
+    def fit(self, texts=(), labels=()):
+        """
+        Learn IDF and term weights from labelled texts on top of the keyword
+        lists; labels outside self.subjects are ignored.
+        """
+        column = {subject: j for j, subject in enumerate(self.subjects)}
+        k = len(self.subjects)
+
+        # Keyword prior: each keyword is one pseudo-document of its subject
+        prior = np.zeros((N_FEATURES, k), dtype=np.float32)
+        prior_df = np.zeros(N_FEATURES, dtype=np.float32)
+        n_keywords = 0
+        for subject in self.subjects:
+            for kw in SUBJECT_KEYWORDS.get(subject, []):
+                weight = 1.0 if kw[0].isalnum() else SYMBOL_PRIOR_WEIGHT
+                indices = np.unique([_feature_index(f) for f in _keyword_features(kw)])
+                prior[indices, column[subject]] = np.maximum(prior[indices, column[subject]], weight)
+                prior_df[indices] += 1
+                n_keywords += 1
+        prior[_feature_index("m:expr"), column["Math"]] = 1.0 if "Math" in column else 0.0
+
+        # Document frequency per subject, class-balanced so a subject with
+        # many questions does not claim every common word
+        pairs = [(text, column[label]) for text, label in zip(texts, labels) if label in column and text]
+        doc_df = np.zeros((N_FEATURES, k), dtype=np.float32)
+        if pairs:
+            rows, cols, _ = _hash_batch([text for text, _ in pairs])
+            doc_labels = np.asarray([j for _, j in pairs], dtype=np.int64)
+            class_sizes = np.bincount(doc_labels, minlength=k).astype(np.float32)
+            # (down-weighting only: scaling a single question up would amplify noise)
+            balance = np.minimum(class_sizes.sum() / k / np.maximum(class_sizes, 1), 1.0)
+            for j in range(k):
+                mask = doc_labels[rows] == j
+                doc_df[:, j] = np.bincount(cols[mask], minlength=N_FEATURES) * balance[j]
+            raw_df = np.bincount(cols, minlength=N_FEATURES).astype(np.float32)
+        else:
+            raw_df = np.zeros(N_FEATURES, dtype=np.float32)
+
+        n_docs = len(pairs) + n_keywords
+        self.idf = (np.log((1 + n_docs) / (1 + raw_df + prior_df)) + 1).astype(np.float32)
+
+        # Share of a term's occurrences that fall in each subject, keeping
+        # only the part above an even split: terms common to every subject
+        # ("what", "explain") score nothing
+        counts = KEYWORD_PRIOR_STRENGTH * prior + doc_df
+        share = counts / (counts.sum(axis=1, keepdims=True) + WEIGHT_SMOOTHING)
+        if k > 1:
+            share = np.maximum(share - 1.0 / k, 0) * (k / (k - 1))
+        self.weights = share.astype(np.float32)
+        self.trained_on = len(pairs)
+        return self
+
+    def score_batch(self, texts):
+        """Return an (len(texts), len(subjects)) array of subject scores"""
+        texts = list(texts)
+        scores = np.zeros((len(texts), len(self.subjects)), dtype=np.float32)
+        rows, cols, counts = _hash_batch(texts)
+        if not len(rows):
+            return scores
+        tfidf = (1 + np.log(counts)) * self.idf[cols]
+        norms = np.sqrt(np.bincount(rows, weights=tfidf * tfidf, minlength=len(texts)))
+        tfidf /= norms[rows]
+        term_weights = self.weights[cols]
+        for j in range(len(self.subjects)):
+            scores[:, j] = np.bincount(rows, weights=tfidf * term_weights[:, j], minlength=len(texts))
+        return scores
+
+    def detect(self, scores):
+        """Subjects detected from one row of scores, best first"""
+        best = float(scores.max()) if len(scores) else 0.0
+        if best < MIN_SUBJECT_SCORE:
+            return []
+        order = np.argsort(-scores, kind="stable")
+        return [self.subjects[j] for j in order if scores[j] >= max(MIN_SUBJECT_SCORE, RELATIVE_SUBJECT_SCORE * best)]
+
+    def classify_batch(self, texts):
+        """
+        Classify many texts in one vectorized pass.
+        Returns [(subject, score)] per text; "General" when nothing scores
+        above MIN_SUBJECT_SCORE.
+        """
+        scores = self.score_batch(texts)
+        if not len(scores):
+            return []
+        best = scores.argmax(axis=1)
+        results = []
+        for row, j in zip(scores, best):
+            score = float(row[j])
+            results.append((self.subjects[j], score) if score >= MIN_SUBJECT_SCORE else ("General", score))
+        return results
+
+
+def load_training_data(limit=None):
+    """(questions, subjects) from the interactions table, newest first"""
+    sql = "SELECT question, subject FROM interactions WHERE question IS NOT NULL ORDER BY id DESC"
+    try:
+        with connection() as conn:
+            if limit:
+                rows = conn.execute(sql + " LIMIT ?", (limit,)).fetchall()
+            else:
+                rows = conn.execute(sql).fetchall()
+    except sqlite3.Error:
+        return [], []
+    return [r[0] for r in rows], [r[1] for r in rows]
+
+
+_classifier = None
+_classifier_lock = threading.Lock()
+_training = None  # background thread training the shared classifier
+
+
+def _train():
+    global _classifier
+    try:
+        refresh_classifier()
+    except Exception:
+        logger.exception("Subject classifier training failed; using the keyword lists only")
+        keyword_only = SubjectClassifier().fit()
+        with _classifier_lock:
+            _classifier = keyword_only
+
+
+def start_training():
+    """
+    Train the shared classifier on a background thread, once per process.
+    Returns the training thread, or None when the classifier is ready.
+    """
+    global _training
+    with _classifier_lock:
+        if _classifier is not None:
+            return None
+        if _training is None or not _training.is_alive():
+            _training = threading.Thread(target=_train, name="subject-classifier-training", daemon=True)
+            _training.start()
+        return _training
+
+
+def get_classifier(wait=True):
+    """
+    Shared classifier, trained from interactions on first use.
+    With wait=False returns None instead of blocking while it trains.
+    """
+    training = start_training()
+    if training is not None and wait:
+        training.join()
+    return _classifier
+
+
+def refresh_classifier():
+    """Retrain the shared classifier from the newest interactions"""
+    global _classifier
+    classifier = SubjectClassifier().fit(*load_training_data(TRAINING_ROW_LIMIT))
+    with _classifier_lock:
+        _classifier = classifier
+    return classifier
+
+
+def classify_batch(texts):
+    return get_classifier().classify_batch(texts)
+
+
+def find_mislabeled_interactions(batch_size=5000):
+    """
+    Re-classify all stored interactions, batch_size rows at a time.
+    Returns [(interaction_id, stored_subject, predicted_subject, score)] where
+    the prediction is confident and differs from the stored subject.
+    """
+    classifier = get_classifier()
+    mismatches = []
+    with connection() as conn:
+        cursor = conn.execute(
+            "SELECT id, subject, question FROM interactions WHERE question IS NOT NULL"
+        )
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            results = classifier.classify_batch([r[2] for r in rows])
+            for (interaction_id, stored, _), (predicted, score) in zip(rows, results):
+                if predicted != "General" and predicted != stored:
+                    mismatches.append((interaction_id, stored, predicted, score))
+    return mismatches
+
+
+def detect_topic(text, subject, default="general"):
+    """
+    Most frequent keyword of `subject` in text, used as the mastery topic;
+    ties go to the longer (more specific) keyword.
+    """
+    hits = Counter(
+        m.group(m.lastgroup)
+        for m in _MATCHER.finditer((text or "").lower())
+        if m.lastgroup in ("word", "short")
+    )
+    candidates = [kw for kw in hits if _KEYWORD_SUBJECT[kw] == subject]
+    if not candidates:
+        return default
+    return max(candidates, key=lambda kw: (hits[kw], len(kw)))
+
+
+@traced
+def check_subject_compliance(question_text, selected_subject):
+    """
+    Validate that a question belongs to the selected subject.
+    Only allow questions related to the selected subject.
+    """
+    classifier = get_classifier(wait=False)
+    if classifier is not None:
+        detected_subjects = classifier.detect(classifier.score_batch([question_text])[0])
+    else:
+        # Still training: keyword and pattern hits, most hits first
+        hits = count_subject_hits(question_text)
+        detected_subjects = sorted(hits, key=hits.get, reverse=True)
+
+    if selected_subject == "General":
+        return True, detected_subjects
+
+    if selected_subject in detected_subjects:
+        return True, detected_subjects
+
+    return False, detected_subjects
@@ -1,6 +1,8 @@
 import os
-import requests
+import time
+import openai
 from dotenv import load_dotenv
+from llm_client import get_openai_client
 
 # Load environment variables
 load_dotenv()
@@ -15,23 +17,26 @@ OPENROUTER_API_KEY = OPENROUTER_API_KEY.strip()  # Remove spaces/newlines
 print(f"Key length: {len(OPENROUTER_API_KEY)}")
 print(f"Key repr: {repr(OPENROUTER_API_KEY)}")
 
-# Test API request
-url = "https://openrouter.ai/api/v1/chat/completions"
-headers = {
-    "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-    "Content-Type": "application/json",
-}
-data = {
-    "model": "openai/gpt-4o-mini",
-    "messages": [{"role": "user", "content": "Say hello"}],
-    "temperature": 0,
-}
+# Test API request (OPENROUTER_BASE_URL can point at a local mock endpoint)
+base_url = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+client = get_openai_client(OPENROUTER_API_KEY, base_url)
 
-try:
-    r = requests.post(url, headers=headers, json=data)
-    print("Status Code:", r.status_code)
-    print(r.json())
-    if r.status_code == 401:
+# The second request reuses the warm keep-alive connection from the first
+for attempt in (1, 2):
+    try:
+        start = time.perf_counter()
+        response = client.chat.completions.create(
+            model="openai/gpt-4o-mini",
+            messages=[{"role": "user", "content": "Say hello"}],
+            temperature=0,
+        )
+        elapsed = time.perf_counter() - start
+        print(f"Request {attempt}: {elapsed * 1000:.0f} ms")
+        print(response.model_dump())
+    except openai.AuthenticationError as e:
         print("❌ Unauthorized! The key may be invalid or from the wrong account.")
-except Exception as e:
-    print("Request failed:", e)
+        print(e)
+        break
+    except Exception as e:
+        print("Request failed:", e)
+        break
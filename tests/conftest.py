@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_pool import close_connections  # noqa: E402
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run in an empty directory; db_pool opens the databases relative to it"""
+    monkeypatch.chdir(tmp_path)
+    yield tmp_path
+    close_connections()
+
+
+@pytest.fixture
+def student_database(workdir):
+    """A fresh student.db at the latest schema version"""
+    import student_db
+
+    student_db.init_db()
+    return workdir / "student.db"
@@ -0,0 +1,64 @@
+import pytest
+
+import answer_cache
+
+BUCKET = ("Math", "Grade 7", "visual")
+
+
+@pytest.fixture
+def cache(student_database):
+    answer_cache.clear()
+    return answer_cache
+
+
+def lookup(cache, question):
+    return cache.lookup(question, *BUCKET)
+
+
+def test_exact_hit_ignores_case_punctuation_and_spacing(cache):
+    cache.store("What is 100 divided by 4?", *BUCKET, "ANSWER: 25")
+    before = cache.get_stats()["hits"]
+
+    assert lookup(cache, "  what is 100 divided by 4  ") == "ANSWER: 25"
+    assert cache.get_stats()["hits"] == before + 1
+
+
+def test_near_hit_when_only_filler_words_differ(cache):
+    cache.store("What is 100 divided by 4?", *BUCKET, "ANSWER: 25")
+    before = cache.get_stats()["near_hits"]
+
+    assert lookup(cache, "Please tell me what 100 divided by 4 is") == "ANSWER: 25"
+    assert cache.get_stats()["near_hits"] == before + 1
+
+
+@pytest.mark.parametrize(
+    "stored, asked",
+    [
+        ("What is 100 divided by 4?", "What is 4 divided by 100?"),
+        ("Solve 2x + 5 = 15", "Solve 2x + 5 = 17"),
+        ("What is 3 minus 10?", "What is 10 minus 3?"),
+        (
+            "Is the mass of the sun bigger than the mass of the earth",
+            "Is the mass of the earth bigger than the mass of the sun",
+        ),
+        ("Why is the sky blue?", "Why is the sea blue?"),
+        ("What is mitosis?", "What is meiosis?"),
+        ("Explain endothermic reactions", "Explain exothermic reactions"),
+        ("What is absorption?", "What is adsorption?"),
+        ("Define acceleration", "Define deceleration"),
+    ],
+)
+def test_reordered_or_changed_operands_miss(cache, stored, asked):
+    cache.store(stored, *BUCKET, "cached answer")
+    before = cache.get_stats()
+
+    assert lookup(cache, asked) is None
+    after = cache.get_stats()
+    assert after["misses"] == before["misses"] + 1
+    assert after["near_hits"] == before["near_hits"]
+
+
+def test_other_bucket_misses(cache):
+    cache.store("What is 100 divided by 4?", *BUCKET, "ANSWER: 25")
+
+    assert cache.lookup("What is 100 divided by 4?", "Math", "Grade 8", "visual") is None
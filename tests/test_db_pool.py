@@ -0,0 +1,52 @@
+import pytest
+
+from db_pool import connection, transaction
+
+
+@pytest.fixture
+def table(workdir):
+    with transaction() as c:
+        c.execute("CREATE TABLE t (x INTEGER)")
+
+
+def rows():
+    with connection() as conn:
+        return [r[0] for r in conn.execute("SELECT x FROM t ORDER BY x")]
+
+
+def test_nested_transaction_reuses_the_connection(table):
+    with transaction() as outer:
+        outer.execute("INSERT INTO t VALUES (1)")
+        with transaction() as inner:
+            assert inner.connection is outer.connection
+            assert inner.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 1
+
+
+def test_error_in_outer_block_rolls_back_nested_writes(table):
+    with pytest.raises(RuntimeError):
+        with transaction() as outer:
+            outer.execute("INSERT INTO t VALUES (1)")
+            with transaction() as inner:
+                inner.execute("INSERT INTO t VALUES (2)")
+            raise RuntimeError
+
+    assert rows() == []
+
+
+def test_error_in_nested_block_only_undoes_its_own_writes(table):
+    with transaction() as outer:
+        outer.execute("INSERT INTO t VALUES (1)")
+        with pytest.raises(RuntimeError):
+            with transaction() as inner:
+                inner.execute("INSERT INTO t VALUES (2)")
+                raise RuntimeError
+        outer.execute("INSERT INTO t VALUES (3)")
+
+    assert rows() == [1, 3]
+
+
+def test_immediate_transaction_commits(table):
+    with transaction(immediate=True) as c:
+        c.execute("INSERT INTO t VALUES (1)")
+
+    assert rows() == [1]
@@ -0,0 +1,55 @@
+import sqlite3
+
+import student_db
+from db_pool import transaction
+from mastery import get_subject_mastery, record_answers
+from migrations import LEGACY_PLACEHOLDER_TOPIC, run_migrations
+
+PROGRESS_INSERT_SQL = """
+    INSERT INTO student_progress
+    (student_name, subject, topic, difficulty_level, mastery_score, struggle_areas,
+     learning_style, last_session, total_sessions)
+    VALUES (?, ?, ?, 5, ?, '', ?, '2025-09-10 10:00:00', ?)
+"""
+
+
+def test_placeholder_topic_is_not_backfilled_into_mastery(workdir):
+    # student.db as the app wrote it before migrations: every tutor session
+    # on the placeholder row, plus one real topic
+    conn = sqlite3.connect(workdir / "student.db")
+    student_db._create_tables(conn.cursor())
+    conn.execute(PROGRESS_INSERT_SQL, ("Alex", "Math", LEGACY_PLACEHOLDER_TOPIC, 0.0, "auditory", 4))
+    conn.execute(PROGRESS_INSERT_SQL, ("Alex", "Math", "fraction", 0.8, "auditory", 1))
+    conn.commit()
+    conn.close()
+
+    student_db.init_db()
+
+    mastery = get_subject_mastery("Alex", "Math")
+    assert mastery["topic_count"] == 1
+    assert mastery["average_mastery"] == 0.8
+    assert mastery["total_sessions"] == 5
+    assert mastery["learning_style"] == "auditory"
+    assert student_db.get_student_progress("Alex", LEGACY_PLACEHOLDER_TOPIC) == []
+
+
+def test_placeholder_topic_is_dropped_from_migrated_databases(student_database):
+    record_answers("Alex", "Math", [("fraction", True)])
+    fraction = get_subject_mastery("Alex", "Math")["average_mastery"]
+    # what the earlier backfill left behind: the placeholder counted as a topic
+    with transaction() as c:
+        c.execute(PROGRESS_INSERT_SQL, ("Alex", "Math", LEGACY_PLACEHOLDER_TOPIC, 0.0, "visual", 3))
+        c.execute(
+            """
+            UPDATE subject_mastery SET topic_count = topic_count + 1, total_sessions = total_sessions + 3
+            WHERE student_name = 'Alex' AND subject = 'Math'
+            """
+        )
+        c.execute("PRAGMA user_version = 7")
+
+    run_migrations()
+
+    mastery = get_subject_mastery("Alex", "Math")
+    assert mastery["topic_count"] == 1
+    assert mastery["average_mastery"] == fraction
+    assert mastery["total_sessions"] == 3
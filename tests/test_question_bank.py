@@ -0,0 +1,36 @@
+import pytest
+
+import quiz_db
+from question_bank import QuestionBank
+
+
+@pytest.fixture
+def quiz_database(workdir):
+    quiz_db.init_quiz_db()
+    return workdir / "quiz.db"
+
+
+def question(i):
+    return {"question": f"What is {i} + {i}?", "options": [str(2 * i), "0", "1"], "correct": str(2 * i)}
+
+
+def failing_stream(count):
+    """Yields `count` questions, then fails like a dropped connection"""
+    yield from (question(i) for i in range(2, count + 2))
+    raise ConnectionError("stream interrupted")
+
+
+def test_questions_before_a_stream_error_are_kept(quiz_database):
+    bank = QuestionBank(generator=lambda grade, subject, limit: failing_stream(7))
+
+    with pytest.raises(ConnectionError):
+        bank.refill("7", "Math", target=20, max_calls=1)
+
+    assert bank.stock("7", "Math") == 7
+
+
+def test_malformed_and_duplicate_questions_are_skipped(quiz_database):
+    bank = QuestionBank(generator=None)
+    items = [question(2), {"question": "no options"}, question(2), question(3)]
+
+    assert bank.add_questions("7", "Math", items) == 2
@@ -0,0 +1,95 @@
+import sqlite3
+
+import pytest
+
+import quiz_db
+from db_pool import transaction
+from migrations import _archive_legacy_attempts
+from question_bank import QuestionBank
+
+BASELINE_SCHEMA = """
+    CREATE TABLE quiz_attempts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        student_name TEXT,
+        grade TEXT,
+        subject TEXT,
+        qid INTEGER,
+        question TEXT,
+        selected_answer TEXT,
+        correct_answer TEXT,
+        is_correct INTEGER,
+        score INTEGER,
+        attempt_date TEXT
+    )
+"""
+
+
+def legacy_quiz(student, subject, day, correct=(1, 1, 1)):
+    # qid was the LLM's per-quiz id: every quiz reused 1..3
+    return [
+        (student, "Grade 7", subject, qid, f"old question {qid}", "a", "a" if ok else "b", ok, sum(correct), day)
+        for qid, ok in zip((1, 3, 2), correct)
+    ]
+
+
+@pytest.fixture
+def legacy_quiz_db(workdir):
+    """quiz.db as the app wrote it before migrations: two Math quizzes, one Science"""
+    conn = sqlite3.connect(workdir / "quiz.db")
+    conn.execute(BASELINE_SCHEMA)
+    conn.executemany(
+        """
+        INSERT INTO quiz_attempts
+        (student_name, grade, subject, qid, question, selected_answer,
+         correct_answer, is_correct, score, attempt_date)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        legacy_quiz("Alex", "Math", "2025-09-10", (0, 0, 0))
+        + legacy_quiz("Alex", "Math", "2025-09-10", (0, 0, 0))
+        + legacy_quiz("Alex", "Science", "2025-09-11"),
+    )
+    conn.commit()
+    conn.close()
+    quiz_db.init_quiz_db()
+    return workdir / "quiz.db"
+
+
+def bank_questions(count=3):
+    """Served bank questions as (qid, question, options_json, correct)"""
+    bank = QuestionBank(generator=None)
+    items = [
+        {"question": f"New question {i}?", "options": ["x", "y", "z"], "correct": "x"}
+        for i in range(count)
+    ]
+    return [bank.add_served_question("7", "Math", item) for item in items]
+
+
+def test_legacy_attempts_still_count_towards_the_limit(legacy_quiz_db):
+    assert quiz_db.get_attempt_count("Alex", "Math") == 2
+    assert quiz_db.get_attempt_count("Alex", "Science") == 1
+
+
+def test_legacy_attempts_stay_out_of_bank_question_stats(legacy_quiz_db):
+    questions = bank_questions()
+    qids = [q[0] for q in questions]
+    # bank ids start at 1, like the legacy per-quiz ids
+    assert set(qids) == {1, 2, 3}
+
+    quiz_db.record_quiz_attempt(
+        "Alex", "Grade 7", "Math", [(qid, question, correct, correct) for qid, question, _, correct in questions]
+    )
+
+    assert quiz_db.get_question_stats(qids) == {qid: (1, 1) for qid in qids}
+    assert quiz_db.get_attempt_count("Alex", "Math") == 3
+
+
+def test_bank_attempts_survive_the_migration(workdir):
+    # a database that already had the bank when this migration shipped
+    quiz_db.init_quiz_db()
+    questions = bank_questions()
+    quiz_db.record_quiz_attempt("Alex", "Grade 7", "Math", [(q[0], q[1], "y", q[3]) for q in questions])
+
+    with transaction(quiz_db.QUIZ_DB_NAME) as c:
+        _archive_legacy_attempts(c)
+
+    assert quiz_db.get_question_stats([q[0] for q in questions]) == {q[0]: (1, 0) for q in questions}
@@ -0,0 +1,45 @@
+import threading
+
+import student_db
+from db_pool import connection
+
+
+def test_recent_activity_is_the_latest_interactions_whatever_page_is_open(student_database):
+    ids = [student_db.log_interaction("Alex", "Grade 7", "Math", f"q{i}", "a") for i in range(25)]
+    student_db.set_feedback(ids[-1], 1, "")
+
+    _, cursor = student_db.get_interaction_page("Alex", "Grade 7", limit=10)
+    older_page, _ = student_db.get_interaction_page("Alex", "Grade 7", limit=10, cursor=cursor)
+    recent = student_db.get_recent_activity("Alex", "Grade 7", limit=10)
+
+    assert len(recent) == 10
+    assert recent[0][0] == 1  # the newest interaction, rated helpful
+    assert older_page[0][0] == ids[-11]
+    assert student_db.get_recent_activity("Alex", "Grade 8") == []
+
+
+def test_concurrent_ratings_move_the_rollup_once(student_database):
+    inter_id = student_db.log_interaction("Alex", "Grade 7", "Math", "What is a prime?", "a")
+    ratings = [1, -1] * 8
+    barrier = threading.Barrier(len(ratings))
+    errors = []
+
+    def rate(value):
+        barrier.wait()
+        try:
+            student_db.set_feedback(inter_id, value, "")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=rate, args=(value,)) for value in ratings]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    (_, questions, helpful, not_helpful, neutral), = student_db.get_dashboard_summary("Alex", "Grade 7")
+    assert (questions, helpful + not_helpful, neutral) == (1, 1, 0)
+    with connection() as conn:
+        attempts = conn.execute("SELECT SUM(attempts) FROM student_progress WHERE student_name = 'Alex'").fetchone()[0]
+    assert attempts == 1  # only the first rating is mastery evidence
@@ -0,0 +1,66 @@
+import pytest
+
+import student_db
+import subject_classifier
+from subject_classifier import SUBJECT_KEYWORDS, SubjectClassifier, check_subject_compliance
+
+
+def plural(word):
+    return word + ("es" if word.endswith(("s", "x", "ch", "sh")) else "s")
+
+
+# The substring matcher this replaced accepted any question containing a
+# keyword, so every keyword and its plural must still select its subject
+BASELINE_CASES = [
+    (subject, form)
+    for subject, keywords in SUBJECT_KEYWORDS.items()
+    for keyword in keywords
+    # symbols and 2-3 letter abbreviations ("ph", "dna") have no plural
+    if keyword[0].isalnum() and len(keyword) > 3
+    for form in (keyword, plural(keyword))
+]
+
+
+@pytest.fixture(scope="module")
+def keyword_classifier():
+    return SubjectClassifier().fit()
+
+
+@pytest.mark.parametrize("subject, form", BASELINE_CASES)
+def test_baseline_keywords_are_detected(keyword_classifier, subject, form):
+    scores = keyword_classifier.score_batch([f"can you help me with {form}"])[0]
+
+    assert subject in keyword_classifier.detect(scores)
+
+
+@pytest.mark.parametrize(
+    "question, subject",
+    [
+        ("how do cells divide", "Science"),
+        ("how to use commas", "English"),
+        ("what are the factors of 12", "Math"),
+        ("what do chemical reactions produce", "Science"),
+    ],
+)
+def test_inflected_questions_are_accepted(student_database, question, subject):
+    subject_classifier.refresh_classifier()
+
+    allowed, detected = check_subject_compliance(question, subject)
+
+    assert allowed, detected
+
+
+def test_keyword_fallback_while_training(monkeypatch):
+    monkeypatch.setattr(subject_classifier, "_classifier", None)
+    monkeypatch.setattr(subject_classifier, "start_training", lambda: object())
+
+    assert check_subject_compliance("how do cells divide", "Science") == (True, ["Science"])
+    assert check_subject_compliance("how do cells divide", "Math")[0] is False
+
+
+def test_training_reads_at_most_the_row_limit(student_database, monkeypatch):
+    for i in range(10):
+        student_db.log_interaction("Alex", "Grade 7", "Math", f"solve {i}x = 4", "answer")
+    monkeypatch.setattr(subject_classifier, "TRAINING_ROW_LIMIT", 5)
+
+    assert subject_classifier.refresh_classifier().trained_on == 5
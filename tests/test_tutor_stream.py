@@ -0,0 +1,81 @@
+import threading
+
+import pytest
+
+import gamification_service
+import mastery
+from bench.mock_llm import TUTOR_ANSWER, make_server
+from llm_client import get_openai_client
+
+STUDENT = "Alex"
+
+
+def start_mock(**settings):
+    server = make_server(latency_ms=0, jitter_ms=0, tokens_per_second=0, **settings)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}/v1"
+
+
+@pytest.fixture
+def tutor(student_database, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "mock")
+    import tutor_engine
+
+    service = gamification_service.GamificationService()
+    monkeypatch.setattr(gamification_service, "gamification_service", service)
+
+    servers = []
+
+    def with_mock(**settings):
+        """The tutor, talking to a fresh mock server with these settings"""
+        server, base_url = start_mock(**settings)
+        servers.append(server)
+        monkeypatch.setattr(tutor_engine, "get_openai_client", lambda key: get_openai_client(key, base_url))
+        return tutor_engine.enhanced_tutor
+
+    yield with_mock
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def sessions():
+    return (mastery.get_subject_mastery(STUDENT, "Math") or {}).get("total_sessions", 0)
+
+
+def xp():
+    return gamification_service.get_gamification(STUDENT)["xp"]
+
+
+def test_deltas_join_to_the_result(tutor):
+    stream = tutor().ask_tutor_stream("How do I add fractions?", "Math", "Grade 7", STUDENT)
+
+    deltas = list(stream)
+
+    assert len(deltas) > 1
+    assert "".join(deltas).strip() == stream.result()[0] == TUTOR_ANSWER.strip()
+
+
+def test_progress_and_xp_are_written_after_the_stream_ends(tutor):
+    stream = iter(tutor().ask_tutor_stream("How do I add fractions?", "Math", "Grade 7", STUDENT))
+
+    next(stream)
+    assert (sessions(), xp()) == (0, 0)
+
+    for _ in stream:
+        pass
+    assert (sessions(), xp()) == (1, 10)
+
+
+def test_error_yields_the_error_text(tutor):
+    stream = tutor(error_rate=1.0, error_status=400).ask_tutor_stream(
+        "How do I add fractions?", "Math", "Grade 7", STUDENT
+    )
+
+    deltas = list(stream)
+
+    answer = stream.result()[0]
+    assert deltas == [answer]
+    assert "technical issue" in answer
+    assert (sessions(), xp()) == (0, 0)
@@ -0,0 +1,83 @@
+import smtplib
+
+import pytest
+
+import student_db
+import weekly_email
+from db_pool import transaction
+
+STUDENTS = {"Alex": "alex.parent@example.com", "Sam": "sam.parent@example.com", "Kai": "kai.parent@example.com"}
+
+
+class FakeSMTP:
+    """smtplib.SMTP stand-in; `failures` are raised by the next send_message calls"""
+
+    opened = []
+    failures = []
+
+    def __init__(self, host, port, timeout=None):
+        self.sent = []
+        FakeSMTP.opened.append(self)
+
+    def send_message(self, message):
+        if FakeSMTP.failures:
+            raise FakeSMTP.failures.pop(0)
+        self.sent.append(message["To"])
+
+    def quit(self):
+        pass
+
+
+@pytest.fixture
+def smtp(student_database, monkeypatch):
+    FakeSMTP.opened, FakeSMTP.failures = [], []
+    monkeypatch.setattr(weekly_email.smtplib, "SMTP", FakeSMTP)
+    monkeypatch.setattr(weekly_email, "SMTP_SECURITY", "none")
+    monkeypatch.setattr(weekly_email, "SMTP_LOGIN", False)
+    monkeypatch.setattr(weekly_email, "EMAIL_RETRY_DELAY", 0)
+    monkeypatch.setattr(weekly_email, "PARENT_EMAILS", STUDENTS)
+    for student in STUDENTS:
+        student_db.log_interaction(student, "Grade 7", "Math", "What is 2 + 2?", "4")
+    return FakeSMTP
+
+
+def sent(smtp):
+    return sorted(to for server in smtp.opened for to in server.sent)
+
+
+def test_batch_reuses_one_connection_per_worker(smtp):
+    done, failed = weekly_email.send_weekly_emails(workers=1)
+
+    assert sorted(done) == sorted(STUDENTS) and failed == []
+    assert len(smtp.opened) == 1
+    assert sent(smtp) == sorted(STUDENTS.values())
+
+
+def test_transient_reply_is_retried(smtp):
+    smtp.failures = [smtplib.SMTPResponseException(451, b"try again later")]
+
+    done, failed = weekly_email.send_weekly_emails(["Alex"])
+
+    assert done == ["Alex"] and failed == []
+    assert sent(smtp) == [STUDENTS["Alex"]]
+
+
+def test_permanent_reply_is_not_retried(smtp):
+    smtp.failures = [smtplib.SMTPResponseException(550, b"no such mailbox")]
+
+    done, failed = weekly_email.send_weekly_emails(["Alex", "Sam"], workers=1)
+
+    assert done == ["Sam"]
+    assert [student for student, _ in failed] == ["Alex"]
+    assert sent(smtp) == [STUDENTS["Sam"]]
+
+
+def test_summaries_without_the_created_at_index(student_database):
+    student_db.log_interaction("Alex", "Grade 7", "Math", "What is 2 + 2?", "4")
+    with transaction() as c:
+        c.execute("DROP INDEX idx_interactions_created")
+
+    summaries = weekly_email.get_weekly_summaries()
+
+    assert list(summaries) == ["Alex"]
+    assert summaries["Alex"]["Questions Asked"].tolist() == [1]
@@ -1,11 +1,11 @@
 import os
 import json
-import openai
-from student_db import (
-    update_student_progress,
-    update_gamification,
-    get_student_progress,
-)
+from mastery import get_subject_mastery, record_tutor_session
+from subject_classifier import detect_topic
+from gamification_service import update_gamification
+from llm_client import get_openai_client
+from perf_trace import span, traced
+import answer_cache
 
 
 class EnhancedAITutor:
@@ -13,24 +13,22 @@ class EnhancedAITutor:
         self.api_key = os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise RuntimeError("❌ Missing OPENAI_API_KEY environment variable.")
-        openai.api_key = self.api_key
         self.model = "gpt-4o-mini"
 
+    @traced
     def analyze_student_pattern(self, student_name, subject):
-        """Fetch recent performance to guide adaptive learning"""
-        progress = get_student_progress(student_name, subject)
+        """Read the precomputed mastery summary to guide adaptive learning"""
+        mastery = get_subject_mastery(student_name, subject)
         analysis = {
-            "is_new_student": len(progress) == 0,
-            "total_sessions": len(progress),
-            "average_mastery": (
-                sum([p[5] for p in progress]) / len(progress) if progress else 0
-            ),
-            "learning_style": progress[0][7] if progress else "visual",
+            "is_new_student": mastery is None,
+            "total_sessions": mastery["total_sessions"] if mastery else 0,
+            "average_mastery": mastery["average_mastery"] if mastery else 0,
+            "recommended_difficulty": mastery["recommended_difficulty"] if mastery else 1,
+            "learning_style": mastery["learning_style"] if mastery else "visual",
         }
         return analysis
 
-    def generate_personalized_prompt(self, question, subject, grade, analysis):
-        """Generate context-aware, adaptive prompt"""
+    def get_teaching_approach(self, analysis):
         teaching_approach = "balanced explanation"
         if analysis["is_new_student"]:
             teaching_approach = "friendly intro, simple steps"
@@ -38,6 +36,11 @@ class EnhancedAITutor:
             teaching_approach = "step-by-step, scaffolded guidance"
         elif analysis["average_mastery"] > 0.8:
             teaching_approach = "advanced challenge with deeper concepts"
+        return teaching_approach
+
+    def generate_personalized_prompt(self, question, subject, grade, analysis):
+        """Generate context-aware, adaptive prompt"""
+        teaching_approach = self.get_teaching_approach(analysis)
 
         learning_styles = {
             "visual": "Include diagrams and visual metaphors",
@@ -98,65 +101,165 @@ Do NOT respond in JSON format - provide a natural, conversational educational re
             ]
         return content, hints[:5]
 
+    def build_messages(self, prompt):
+        return [
+            {
+                "role": "system",
+                "content": "You are an expert AI tutor with advanced pedagogical knowledge. Provide clear, engaging, and educational responses formatted with sections and emojis for better readability.",
+            },
+            {"role": "user", "content": prompt},
+        ]
+
+    @traced
+    def finish_response(self, content, question, subject, student_name, analysis):
+        """Format a completed answer and record progress/gamification"""
+        formatted_text, hints = self.format_response(content)
+
+        # Count the session on the question's topic; mastery itself only
+        # changes on quiz answers and feedback (see mastery.py)
+        record_tutor_session(
+            student_name,
+            subject,
+            detect_topic(question, subject),
+            analysis.get("learning_style", "visual"),
+        )
+        update_gamification(student_name, xp=10)
+
+        # Basic resources
+        resources = [
+            {
+                "title": f"{subject} Practice Problems",
+                "link": "https://www.khanacademy.org",
+                "description": "Interactive exercises and explanations",
+            },
+            {
+                "title": f"{subject} Video Tutorials",
+                "link": "https://www.youtube.com",
+                "description": "Visual learning resources",
+            },
+        ]
+
+        return formatted_text, hints, json.dumps(resources)
+
+    def error_response(self, student_name, error):
+        error_response = f"Hi {student_name}! 👋\n\n❌ I encountered a technical issue: {str(error)}\n\n🔄 Please try again."
+        fallback_hints = [
+            "Check your internet connection",
+            "Try rephrasing your question",
+            "Contact your teacher if issues persist",
+        ]
+        return error_response, fallback_hints, json.dumps([])
+
+    @traced
     def ask_tutor_sync(self, question, subject, grade, student_name="Anonymous"):
         analysis = self.analyze_student_pattern(student_name, subject)
-        prompt = self.generate_personalized_prompt(question, subject, grade, analysis)
+        approach = self.get_teaching_approach(analysis)
 
         try:
-            # Using OpenAI SDK v1.0+
-            client = openai.OpenAI()
-            response = client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert AI tutor with advanced pedagogical knowledge. Provide clear, engaging, and educational responses formatted with sections and emojis for better readability.",
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                temperature=0.7,
-                max_tokens=1200,
+            cached = answer_cache.lookup(question, subject, grade, approach)
+            if cached:
+                return self.finish_response(cached, question, subject, student_name, analysis)
+
+            prompt = self.generate_personalized_prompt(
+                question, subject, grade, analysis
             )
+            # Shared client: reuses pooled keep-alive connections
+            client = get_openai_client(self.api_key)
+            with span("llm.chat"):
+                response = client.chat.completions.create(
+                    model=self.model,
+                    messages=self.build_messages(prompt),
+                    temperature=0.7,
+                    max_tokens=1200,
+                )
 
             content = response.choices[0].message.content.strip()
-            formatted_text, hints = self.format_response(content)
-
-            # Update student progress & gamification
-            update_student_progress(
-                student_name,
-                subject,
-                "current_topic",
-                5,
-                analysis.get("average_mastery", 0.7),
-                "",
-                analysis.get("learning_style", "visual"),
+            answer_cache.store(question, subject, grade, approach, content)
+            return self.finish_response(content, question, subject, student_name, analysis)
+
+        except Exception as e:
+            return self.error_response(student_name, e)
+
+    def ask_tutor_stream(self, question, subject, grade, student_name="Anonymous"):
+        return TutorStream(self, question, subject, grade, student_name)
+
+
+class TutorStream:
+    """
+    Iterates over the tutor's answer as text deltas while it is generated.
+    Once exhausted, result() returns the same (answer, hints, resources_json)
+    as ask_tutor_sync; progress and gamification are written only after the
+    stream has finished.
+    """
+
+    def __init__(self, tutor, question, subject, grade, student_name):
+        self.tutor = tutor
+        self.question = question
+        self.subject = subject
+        self.grade = grade
+        self.student_name = student_name
+        self.answer = ""
+        self.hints = []
+        self.resources_json = json.dumps([])
+        self.done = False
+
+    def __iter__(self):
+        tutor = self.tutor
+        analysis = tutor.analyze_student_pattern(self.student_name, self.subject)
+        approach = tutor.get_teaching_approach(analysis)
+        parts = []
+        try:
+            cached = answer_cache.lookup(
+                self.question, self.subject, self.grade, approach
             )
-            update_gamification(student_name, xp=10)
-
-            # Basic resources
-            resources = [
-                {
-                    "title": f"{subject} Practice Problems",
-                    "link": "https://www.khanacademy.org",
-                    "description": "Interactive exercises and explanations",
-                },
-                {
-                    "title": f"{subject} Video Tutorials",
-                    "link": "https://www.youtube.com",
-                    "description": "Visual learning resources",
-                },
-            ]
+            if cached:
+                self.answer, self.hints, self.resources_json = tutor.finish_response(
+                    cached, self.question, self.subject, self.student_name, analysis
+                )
+                yield cached
+                return
 
-            return formatted_text, hints, json.dumps(resources)
+            prompt = tutor.generate_personalized_prompt(
+                self.question, self.subject, self.grade, analysis
+            )
+            client = get_openai_client(tutor.api_key)
+            # includes the time the caller spends rendering each delta
+            with span("llm.stream"):
+                stream = client.chat.completions.create(
+                    model=tutor.model,
+                    messages=tutor.build_messages(prompt),
+                    temperature=0.7,
+                    max_tokens=1200,
+                    stream=True,
+                )
+                for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        parts.append(delta)
+                        yield delta
 
+            content = "".join(parts).strip()
+            if not content:
+                raise ValueError("Empty AI response")
+            answer_cache.store(self.question, self.subject, self.grade, approach, content)
+            self.answer, self.hints, self.resources_json = tutor.finish_response(
+                content, self.question, self.subject, self.student_name, analysis
+            )
         except Exception as e:
-            error_response = f"Hi {student_name}! 👋\n\n❌ I encountered a technical issue: {str(e)}\n\n🔄 Please try again."
-            fallback_hints = [
-                "Check your internet connection",
-                "Try rephrasing your question",
-                "Contact your teacher if issues persist",
-            ]
-            return error_response, fallback_hints, json.dumps([])
+            self.answer, self.hints, self.resources_json = tutor.error_response(
+                self.student_name, e
+            )
+            yield ("\n\n" if parts else "") + self.answer
+        finally:
+            self.done = True
+
+    def result(self):
+        if not self.done:
+            for _ in self:
+                pass
+        return self.answer, self.hints, self.resources_json
 
 
 # --- Singleton instance ---
@@ -165,3 +268,7 @@ enhanced_tutor = EnhancedAITutor()
 
 def ask_tutor_sync(question, subject, grade, student_name="Anonymous"):
     return enhanced_tutor.ask_tutor_sync(question, subject, grade, student_name)
+
+
+def ask_tutor_stream(question, subject, grade, student_name="Anonymous"):
+    return enhanced_tutor.ask_tutor_stream(question, subject, grade, student_name)
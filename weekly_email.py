@@ -1,75 +1,135 @@
 # weekly_email.py
-import sqlite3
-import pandas as pd
-import yagmail
-from datetime import datetime, timedelta
+import json
+import os
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.message import EmailMessage
 
-DB_NAME = "student.db"
+from db_pool import connection, timestamp_ago
+from lazy_imports import lazy_import
+
+pd = lazy_import("pandas")
 
 # ----------------- CONFIGURATION -----------------
-SMTP_EMAIL = "shweta.ladne.averybit@gmail.com"  # your email
-SMTP_PASSWORD = "lesx zjdt asgs ugtv"  # Gmail app password recommended
+SMTP_EMAIL = os.getenv("SMTP_EMAIL", "shweta.ladne.averybit@gmail.com")  # your email
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "lesx zjdt asgs ugtv")  # Gmail app password recommended
 PARENT_EMAILS = {
     "Alex": "shweta.ladne.averybit@example.com",
     # Add more students here
 }
 
+# Server settings; for a local stand-in (e.g. `python -m aiosmtpd -n -l localhost:8025`)
+# use SMTP_HOST=localhost SMTP_PORT=8025 SMTP_SECURITY=none SMTP_LOGIN=0
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "465"))
+SMTP_SECURITY = os.getenv("SMTP_SECURITY", "ssl")  # ssl | starttls | none
+SMTP_LOGIN = os.getenv("SMTP_LOGIN", "1") != "0"
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "30"))
+
+# Batch job: each worker keeps one SMTP connection open for all its messages
+EMAIL_WORKERS = int(os.getenv("EMAIL_WORKERS", "4"))
+EMAIL_MAX_RETRIES = int(os.getenv("EMAIL_MAX_RETRIES", "3"))
+EMAIL_RETRY_DELAY = float(os.getenv("EMAIL_RETRY_DELAY", "1.0"))  # doubled per retry
+
+SUMMARY_COLUMNS = ["Subject", "Questions Asked", "Helpful Answers", "Not Helpful"]
+
 
 # ----------------- FETCH WEEKLY DATA -----------------
 def get_weekly_summary(student_name, grade=None):
     """
     Fetch student's interactions in the past 7 days and summarize.
     """
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    week_ago = datetime.now() - timedelta(days=7)
+    week_ago = timestamp_ago(days=7)
 
-    if grade:
-        c.execute(
-            """
-            SELECT subject, COUNT(*), 
-                   SUM(CASE WHEN feedback = 1 THEN 1 ELSE 0 END) as helpful,
-                   SUM(CASE WHEN feedback = -1 THEN 1 ELSE 0 END) as not_helpful
-            FROM interactions
-            WHERE student = ? AND grade = ? AND datetime(created_at) >= ?
-            GROUP BY subject
-        """,
-            (student_name, grade, week_ago.strftime("%Y-%m-%d %H:%M:%S")),
-        )
-    else:
+    with connection() as conn:
+        c = conn.cursor()
+        if grade:
+            c.execute(
+                """
+                SELECT subject, COUNT(*), 
+                       SUM(CASE WHEN feedback = 1 THEN 1 ELSE 0 END) as helpful,
+                       SUM(CASE WHEN feedback = -1 THEN 1 ELSE 0 END) as not_helpful
+                FROM interactions
+                WHERE student = ? AND grade = ? AND created_at >= ?
+                GROUP BY subject
+            """,
+                (student_name, grade, week_ago),
+            )
+        else:
+            c.execute(
+                """
+                SELECT subject, COUNT(*), 
+                       SUM(CASE WHEN feedback = 1 THEN 1 ELSE 0 END) as helpful,
+                       SUM(CASE WHEN feedback = -1 THEN 1 ELSE 0 END) as not_helpful
+                FROM interactions
+                WHERE student = ? AND created_at >= ?
+                GROUP BY subject
+            """,
+                (student_name, week_ago),
+            )
+        rows = c.fetchall()
+
+    if not rows:
+        return None
+
+    return pd.DataFrame(rows, columns=SUMMARY_COLUMNS)
+
+
+def get_weekly_summaries(student_names=None):
+    """
+    Every student's past-7-days summary from a single grouped query.
+    Returns {student: DataFrame}; students without activity are left out.
+    """
+    week_ago = timestamp_ago(days=7)
+    # Without a student list, unlikely() marks the week as a small slice so
+    # the planner seeks idx_interactions_created instead of reading every row
+    # of the (student, created_at) index; a database without that index still
+    # runs the query
+    since = "unlikely(created_at >= ?)"
+    student_filter = ""
+    params = [week_ago]
+    if student_names is not None:
+        student_names = list(student_names)
+        if not student_names:
+            return {}
+        # json_each keeps this one statement however many students there are
+        since = "created_at >= ?"
+        student_filter = "AND student IN (SELECT value FROM json_each(?))"
+        params.append(json.dumps(student_names))
+
+    with connection() as conn:
+        c = conn.cursor()
         c.execute(
-            """
-            SELECT subject, COUNT(*), 
+            f"""
+            SELECT student, subject, COUNT(*),
                    SUM(CASE WHEN feedback = 1 THEN 1 ELSE 0 END) as helpful,
                    SUM(CASE WHEN feedback = -1 THEN 1 ELSE 0 END) as not_helpful
             FROM interactions
-            WHERE student = ? AND datetime(created_at) >= ?
-            GROUP BY subject
+            WHERE {since} {student_filter}
+            GROUP BY student, subject
+            ORDER BY student, subject
         """,
-            (student_name, week_ago.strftime("%Y-%m-%d %H:%M:%S")),
+            params,
         )
-
-    rows = c.fetchall()
-    conn.close()
-
+        rows = c.fetchall()
     if not rows:
-        return None
+        return {}
 
-    return pd.DataFrame(
-        rows, columns=["Subject", "Questions Asked", "Helpful Answers", "Not Helpful"]
-    )
+    df = pd.DataFrame(rows, columns=["Student"] + SUMMARY_COLUMNS)
+    return {
+        student: group.drop(columns="Student").reset_index(drop=True)
+        for student, group in df.groupby("Student", sort=False)
+    }
 
 
-def send_weekly_email(student_name):
-    df = get_weekly_summary(student_name)
-    if df is None or student_name not in PARENT_EMAILS:
-        print(f"No data to send or email not configured for {student_name}")
-        return
-
+# ----------------- EMAIL -----------------
+def render_email_body(student_name, df):
     # Convert DataFrame to HTML table
     table_html = df.to_html(index=False, border=0, justify="center")
 
-    email_body = f"""
+    return f"""
     <html>
     <body>
         <p>Hello,</p>
@@ -81,19 +141,133 @@ def send_weekly_email(student_name):
     </html>
     """
 
+
+def build_message(student_name, to, df):
+    message = EmailMessage()
+    message["From"] = SMTP_EMAIL
+    message["To"] = to
+    message["Subject"] = f"Weekly Learning Summary for {student_name}"
+    message.set_content(render_email_body(student_name, df), subtype="html")
+    return message
+
+
+def open_smtp():
+    if SMTP_SECURITY == "ssl":
+        server = smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)
+    else:
+        server = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)
+        if SMTP_SECURITY == "starttls":
+            server.starttls()
+    if SMTP_LOGIN:
+        server.login(SMTP_EMAIL, SMTP_PASSWORD)
+    return server
+
+
+def _is_transient(error):
+    # 4xx replies and dropped connections are worth retrying; 5xx are not
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return False
+    return isinstance(error, (smtplib.SMTPException, OSError))
+
+
+class SMTPSession:
+    """One SMTP connection reused for many messages, reopened after a failure"""
+
+    def __init__(self):
+        self.server = None
+
+    def send(self, message):
+        for attempt in range(1, EMAIL_MAX_RETRIES + 1):
+            try:
+                if self.server is None:
+                    self.server = open_smtp()
+                self.server.send_message(message)
+                return
+            except Exception as e:
+                # an error reply leaves the connection usable; anything else may not
+                if not isinstance(e, smtplib.SMTPResponseException):
+                    self.close()
+                if attempt == EMAIL_MAX_RETRIES or not _is_transient(e):
+                    raise
+                time.sleep(EMAIL_RETRY_DELAY * 2 ** (attempt - 1))
+
+    def close(self):
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except Exception:
+                pass
+            self.server = None
+
+
+def send_weekly_email(student_name):
+    df = get_weekly_summary(student_name)
+    if df is None or student_name not in PARENT_EMAILS:
+        print(f"No data to send or email not configured for {student_name}")
+        return
+
+    session = SMTPSession()
     try:
-        yag = yagmail.SMTP(SMTP_EMAIL, SMTP_PASSWORD)
-        yag.send(
-            to=PARENT_EMAILS[student_name],
-            subject=f"Weekly Learning Summary for {student_name}",
-            contents=email_body,
-        )
+        session.send(build_message(student_name, PARENT_EMAILS[student_name], df))
         print(f"✅ Email sent to {student_name}'s parent")
     except Exception as e:
         print(f"❌ Failed to send email: {e}")
+    finally:
+        session.close()
+
+
+def send_weekly_emails(student_names=None, workers=EMAIL_WORKERS):
+    """
+    Batch job: one summary query for all students, then render and send in
+    `workers` threads, each reusing a single SMTP connection.
+    Returns (sent_students, [(student, error)]).
+    """
+    students = [s for s in (student_names or PARENT_EMAILS) if s in PARENT_EMAILS]
+    summaries = get_weekly_summaries(students)
+    jobs = [(s, summaries[s]) for s in students if s in summaries]
+
+    local = threading.local()
+    sessions = []
+    sessions_lock = threading.Lock()
+
+    def deliver(student, df):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = SMTPSession()
+            with sessions_lock:
+                sessions.append(session)
+        session.send(build_message(student, PARENT_EMAILS[student], df))
+
+    sent, failed = [], []
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(jobs)))) as pool:
+            futures = {pool.submit(deliver, s, df): s for s, df in jobs}
+            for future in as_completed(futures):
+                student = futures[future]
+                try:
+                    future.result()
+                    sent.append(student)
+                except Exception as e:
+                    failed.append((student, str(e)))
+    finally:
+        for session in sessions:
+            session.close()
+
+    print(
+        f"✅ Weekly emails: {len(sent)} sent, {len(failed)} failed, "
+        f"{len(students) - len(jobs)} skipped (no activity)"
+    )
+    for student, error in failed:
+        print(f"❌ Failed to send email for {student}: {error}")
+    return sent, failed
 
 
 # ----------------- RUN FOR ALL STUDENTS -----------------
 if __name__ == "__main__":
-    for student in PARENT_EMAILS.keys():
-        send_weekly_email(student)
+    from student_db import init_db
+
+    # Bring student.db up to the current schema and indexes first
+    init_db()
+    send_weekly_emails()